@@ -106,7 +106,7 @@ def create_app():
             resources={
                 r"/api/*": {
                     "origins": frontend_urls,
-                    "allow_headers": ["Content-Type", "Authorization"],
+                    "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key"],
                     "expose_headers": ["Set-Cookie"],
                     "methods": ["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"]
                 }
@@ -127,6 +127,7 @@ def create_app():
     from .routes.routes_config import bp_config
     from .routes.routes_upload import bp_upload
     from .routes.routes_coment import bp_coment
+    from .routes import routes_socket  # noqa: F401 (registra os eventos do Socket.IO)
 
     app.register_blueprint(bp_menu, url_prefix='/api/menu')
     app.register_blueprint(bp_orders, url_prefix='/api/orders')
@@ -1,7 +1,7 @@
 from functools import wraps
 from flask import jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from app.models import User
+from app.services.identity_service import get_identity
 
 def admin_required():
     """
@@ -13,10 +13,10 @@ def admin_required():
         def decorator(*args, **kwargs):
             verify_jwt_in_request()
             user_id = get_jwt_identity()
-            current_user = User.query.get(user_id)
+            current_user = get_identity(user_id)  # Cache: sem SELECT por requisição
 
             # Verifica se existe e se tem permissão mínima
-            if not current_user or current_user.role not in ['admin', 'super_admin']:
+            if not current_user or current_user['role'] not in ['admin', 'super_admin']:
                 return jsonify(msg='Acesso negado. Área restrita a administradores.'), 403
 
             return fn(*args, **kwargs)
@@ -33,10 +33,10 @@ def super_admin_required():
         def decorator(*args, **kwargs):
             verify_jwt_in_request()
             user_id = get_jwt_identity()
-            current_user = User.query.get(user_id)
+            current_user = get_identity(user_id)
 
             # Verifica se é estritamente super_admin
-            if not current_user or current_user.role != 'super_admin':
+            if not current_user or current_user['role'] != 'super_admin':
                 return jsonify(msg='Acesso negado. Requer nível Super Admin.'), 403
 
             return fn(*args, **kwargs)
@@ -56,14 +56,14 @@ def verified_user_required():
             # 1. Garante que o JWT é válido estruturalmente
             verify_jwt_in_request()
             
-            # 2. Pega o ID e busca o status REAL no banco
+            # 2. Pega o ID e busca o status REAL (cache invalidado quando o banco muda)
             user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            user = get_identity(user_id)
             
             if not user:
                 return jsonify({"error": "Usuário não encontrado."}), 404
                 
-            if not user.is_verified:
+            if not user['is_verified']:
                 return jsonify({
                     "error": "Sua conta precisa ser verificada ou foi suspensa.", 
                     "code": "account_locked"
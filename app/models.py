@@ -2,7 +2,7 @@ from datetime import datetime
 from .extensions import db
 import json
 import bleach
-from sqlalchemy import event, Numeric
+from sqlalchemy import event, Numeric, DDL
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
@@ -47,6 +47,10 @@ class User(db.Model):
 
 
 class Address(db.Model):
+    __table_args__ = (
+        db.Index('ix_address_user_id', 'user_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
@@ -59,6 +63,11 @@ class Address(db.Model):
 
 
 class Product(db.Model):
+    __table_args__ = (
+        # Cardápio público: WHERE is_available = true [AND category = ...]
+        db.Index('ix_product_is_available_category', 'is_available', 'category'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
@@ -68,6 +77,9 @@ class Product(db.Model):
     details_json = db.Column(db.Text, default='{}')
     is_available = db.Column(db.Boolean, default=True)
     stock_quantity = db.Column(db.Integer, nullable=True)
+    # Sobe a cada escrita de estoque que NÃO vem do write-back do Redis
+    # (admin, checkout sem o motor). O write-back só grava se a versão bater.
+    stock_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     is_deleted = db.Column(db.Boolean, default=False)
 
     def get_details(self):
@@ -79,6 +91,16 @@ class Product(db.Model):
 
 class Order(db.Model):
     __tablename__ = 'order'
+    __table_args__ = (
+        # Lista do admin / keyset: ORDER BY date_created DESC, id DESC
+        db.Index('ix_order_date_created_id', 'date_created', 'id'),
+        # Relatórios e cozinha: WHERE status = ... AND date_created BETWEEN ...
+        db.Index('ix_order_status_date_created', 'status', 'date_created'),
+        # Filtro por forma de pagamento no período
+        db.Index('ix_order_payment_method_date_created', 'payment_method', 'date_created'),
+        # "Meus pedidos" do cliente
+        db.Index('ix_order_user_id_date_created', 'user_id', 'date_created'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
@@ -107,6 +129,11 @@ class Order(db.Model):
 
 
 class OrderItem(db.Model):
+    __table_args__ = (
+        db.Index('ix_order_item_order_id', 'order_id'),
+        db.Index('ix_order_item_product_id', 'product_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
@@ -120,6 +147,11 @@ class OrderItem(db.Model):
 # ... imports ...
 
 class ChatMessage(db.Model):
+    __table_args__ = (
+        # Histórico de uma conversa, em ordem cronológica (+ id: desempate da paginação)
+        db.Index('ix_chat_message_user_id_timestamp_id', 'user_id', 'timestamp', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     message = db.Column(db.Text, nullable=False)
@@ -131,6 +163,29 @@ class ChatMessage(db.Model):
     # Relacionamento (Opcional, ajuda na consulta)
     # user = db.relationship('User', backref='messages')
 
+class Conversation(db.Model):
+    """
+    Uma linha por conversa de chat (cliente <-> restaurante), atualizada a
+    cada mensagem. É a caixa de entrada do admin: listar conversas vira uma
+    leitura por índice, sem agrupar a tabela de mensagens inteira.
+    total_chars é a soma de len(message) das mensagens guardadas: assim o
+    limite de histórico não precisa ler tudo.
+    """
+    __table_args__ = (
+        # Caixa de entrada: mais recentes primeiro (keyset por last_message_at, user_id)
+        db.Index('ix_conversation_last_message_at_user_id', 'last_message_at', 'user_id'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_chars = db.Column(db.Integer, nullable=False, default=0)
+    last_message_at = db.Column(db.DateTime, nullable=True)
+    last_message_preview = db.Column(db.String(120), nullable=True)
+    unread_by_admin = db.Column(db.Integer, nullable=False, default=0)  # Mensagens do cliente não lidas
+    unread_by_user = db.Column(db.Integer, nullable=False, default=0)  # Respostas do restaurante não lidas
+
+    user = db.relationship('User')
+
+
 class Neighborhood(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
@@ -164,6 +219,12 @@ class Coupon(db.Model):
 
 
 class Coments(db.Model):
+    __table_args__ = (
+        db.Index('ix_coments_timestamp', 'timestamp'),
+        db.Index('ix_coments_stars_timestamp', 'stars', 'timestamp'),
+        db.Index('ix_coments_user_id', 'user_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     coment = db.Column(db.Text, nullable=True)
@@ -182,6 +243,64 @@ class Coments(db.Model):
         }
 
 
+class RatingStats(db.Model):
+    """
+    Resumo das avaliações (linha única, id=1): total, soma das notas e
+    quantas avaliações de cada nota. Mantido pelo coment_service na mesma
+    transação de cada avaliação criada/editada/apagada, então a média e o
+    histograma custam uma leitura por chave, não importa quantas avaliações existam.
+    """
+    __tablename__ = 'rating_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    stars_sum = db.Column(db.Integer, nullable=False, default=0)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailySalesRollup(db.Model):
+    """
+    Resumo diário de vendas CONCLUÍDAS (um registro por dia + forma de pagamento).
+    Mantido pelo order_service a cada mudança de status, na mesma transação.
+    O dashboard lê daqui em vez de varrer a tabela de pedidos.
+    """
+    __tablename__ = 'daily_sales_rollup'
+
+    day = db.Column(db.Date, primary_key=True)  # Dia (UTC) do date_created do pedido
+    payment_method = db.Column(db.String(50), primary_key=True, default='')  # '' = não informado
+    revenue = db.Column(Numeric(12, 2), nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    delivery_fees = db.Column(Numeric(12, 2), nullable=False, default=0)
+
+
+
+# ==============================================================================
+# 🔎 BUSCA TEXTUAL DAS AVALIAÇÕES (texto + nome do autor)
+# ==============================================================================
+# Não é coluna/tabela mapeada: cada banco tem o seu (tsvector + GIN no
+# Postgres, FTS5 no SQLite), criado aqui no create_all e na migration, e
+# mantido pelo coment_service. O migrations/env.py ignora esses objetos.
+COMENTS_SEARCH_DDL = {
+    'postgresql': [
+        "ALTER TABLE coments ADD COLUMN IF NOT EXISTS search_vector tsvector",
+        "CREATE INDEX IF NOT EXISTS ix_coments_search_vector ON coments USING GIN (search_vector)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS coments_fts "
+        "USING fts5(coment, author, tokenize = 'unicode61 remove_diacritics 2')",
+    ],
+}
+
+for _dialect, _statements in COMENTS_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Coments.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+event.listen(Coments.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS coments_fts").execute_if(dialect='sqlite'))
+
+
 
 # ==============================================================================
 # 🛡️ SEGURANÇA: SANITIZAÇÃO AUTOMÁTICA (XSS PROTECTION)
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request, redirect, make_response, render_template
-from app.services import auth_service, config_service
+from app.services import auth_service, config_service, identity_service
 from flask_jwt_extended import set_refresh_cookies, jwt_required, get_jwt_identity, unset_jwt_cookies, set_access_cookies
 from app.decorators import super_admin_required, verified_user_required
 from app.extensions import limiter
@@ -269,10 +269,10 @@ def reset_password_confirm():
 @jwt_required(locations=['cookies']) # OBRIGA o token estar no Cookie
 def view_gerente_page():
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = identity_service.get_identity(current_user_id)
 
     # Verificação Rigorosa no Servidor
-    if not user or user.role != 'super_admin':
+    if not user or user['role'] != 'super_admin':
         # Se não for autorizado, redireciona para a home IMEDIATAMENTE.
         # O HTML da página de gerente nunca é enviado para o navegador.
         return redirect('/index.html')
@@ -302,9 +302,9 @@ def create_restaurant_admin():
 @limiter.limit("10 per hour", error_message="Muitas tentativas, tente novamente mais tarde.")
 def pegar_dados_admin():
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = identity_service.get_identity(user_id)
 
-    if not user or user.role != 'super_admin':
+    if not user or user['role'] != 'super_admin':
         return jsonify({'message': 'Acesso proibido!'}), 403
 
     dados_secretos = {
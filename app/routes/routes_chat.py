@@ -1,20 +1,39 @@
 from flask import Blueprint, jsonify, request
 from app.services import chat_service
+from app.services.order_service import parse_page_limit
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.decorators import admin_required, verified_user_required
 from app.extensions import limiter
 bp_chat = Blueprint('chat', __name__)
 
 
+def _history_params():
+    """Lê before_id/after_id/limit da URL para a paginação do histórico."""
+    cursors = {}
+    for name in ('before_id', 'after_id'):
+        raw = request.args.get(name)
+        try:
+            cursors[name] = int(raw) if raw not in (None, '') else None
+        except ValueError:
+            raise ValueError(f"Parâmetro '{name}' inválido.")
+
+    limit = parse_page_limit(request.args.get('limit'), chat_service.DEFAULT_CHAT_PAGE, chat_service.MAX_CHAT_PAGE)
+    return {**cursors, 'limit': limit}
+
+
 # --- ROTA CLIENTE ---
 
 @bp_chat.route('', methods=['GET'])
 @jwt_required()
 @limiter.limit("400 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
 def get_my_messages():
+    """?limit=50 | ?before_id=<id> (mais antigas) | ?after_id=<id> (só as novas)"""
     user_id = get_jwt_identity()
-    msgs = chat_service.get_user_messages_logic(user_id)
-    return jsonify(msgs), 200
+    try:
+        msgs = chat_service.get_user_messages_logic(user_id, **_history_params())
+        return jsonify(msgs), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 
 @bp_chat.route('', methods=['POST'])
@@ -31,6 +50,13 @@ def send_message():
         return jsonify({'error': str(e)}), 400
 
 
+@bp_chat.route('/read', methods=['POST'])
+@jwt_required()
+def mark_my_chat_read():
+    user_id = get_jwt_identity()
+    return jsonify(chat_service.mark_conversation_read_logic(user_id, by_admin=False)), 200
+
+
 # --- ROTA ADMIN (Para o restaurante responder depois) ---
 # O admin precisa passar o ?user_id=ID_DO_CLIENTE na URL
 @bp_chat.route('/admin/reply', methods=['POST'])
@@ -53,18 +79,29 @@ def admin_reply():
 @bp_chat.route('/admin/conversations', methods=['GET'])
 @admin_required()
 def list_conversations():
+    """Caixa de entrada paginada: ?limit=50&cursor=<next_cursor da página anterior>"""
     try:
-        summary = chat_service.get_conversations_summary_logic()
+        limit = parse_page_limit(request.args.get('limit'), chat_service.DEFAULT_INBOX_PAGE, chat_service.MAX_INBOX_PAGE)
+        summary = chat_service.get_conversations_summary_logic(limit, request.args.get('cursor'))
         return jsonify(summary), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+# ROTA ADMIN: Marcar conversa como lida
+@bp_chat.route('/admin/conversations/<int:target_user_id>/read', methods=['POST'])
+@admin_required()
+def mark_conversation_read(target_user_id):
+    return jsonify(chat_service.mark_conversation_read_logic(target_user_id, by_admin=True)), 200
+
 # ROTA ADMIN: Ver histórico de UM cliente
 @bp_chat.route('/admin/history/<int:target_user_id>', methods=['GET'])
 @admin_required()
 def get_user_history(target_user_id):
     try:
-        msgs = chat_service.get_admin_chat_history_logic(target_user_id)
+        msgs = chat_service.get_admin_chat_history_logic(target_user_id, **_history_params())
         return jsonify(msgs), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
\ No newline at end of file
@@ -1,7 +1,10 @@
 from flask import request, jsonify, Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.coment_service import (create_coment, get_all_coments,search_coment,
-                                          delete_coment, delete_self_coment, update_coment)
+                                          delete_coment, delete_self_coment, update_coment,
+                                          get_rating_stats, DEFAULT_REVIEWS_PAGE, MAX_REVIEWS_PAGE,
+                                          DEFAULT_SEARCH_PAGE, MAX_SEARCH_PAGE)
+from app.services.order_service import parse_page_limit
 from app.decorators import admin_required, verified_user_required
 from app.extensions import limiter
 
@@ -21,16 +24,32 @@ def avaliar_produto():
 @bp_coment.route('/listar', methods=['GET'])
 @limiter.limit("200 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
 def listar_comentarios():
+  """?order=recent|stars_desc|stars_asc&limit=30&cursor=<next_cursor da página anterior>"""
   order = request.args.get('order', 'recent')
-  resultado = get_all_coments()
+  try:
+    limit = parse_page_limit(request.args.get('limit'), DEFAULT_REVIEWS_PAGE, MAX_REVIEWS_PAGE)
+    resultado = get_all_coments(order, limit, request.args.get('cursor'))
+  except ValueError as e:
+    return jsonify({'error': str(e)}), 400
   return jsonify(resultado), 200
 
+@bp_coment.route('/stats', methods=['GET'])
+@limiter.limit("600 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
+def resumo_avaliacoes():
+  """Média e histograma de notas: {count, average, histogram: {"1": n, ..., "5": n}}"""
+  return jsonify(get_rating_stats()), 200
+
 @bp_coment.route('/pesquisar', methods=['GET'])
 @admin_required()
 @limiter.limit("200 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
 def pesquisar_comentarios():
+  """?search=<texto ou autor>&limit=20&cursor=<next_cursor da página anterior>"""
   dados = request.args
-  resultado, status = search_coment(dados)
+  try:
+    limit = parse_page_limit(request.args.get('limit'), DEFAULT_SEARCH_PAGE, MAX_SEARCH_PAGE)
+    resultado, status = search_coment(dados, limit, request.args.get('cursor'))
+  except ValueError as e:
+    return jsonify({'error': str(e)}), 400
   return jsonify(resultado), status
 
 
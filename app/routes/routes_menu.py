@@ -1,18 +1,42 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, make_response
 from app.services import product_service
 from flask_jwt_extended import jwt_required
 from app.decorators import admin_required
 from app.extensions import limiter
 bp_menu = Blueprint('menu', __name__)
 
+
+def _menu_snapshot_response(variant):
+    """
+    Serve o snapshot pré-serializado do cardápio (bytes prontos, gzip se aceito).
+    Se o cliente já tem a versão atual (If-None-Match), devolve 304 sem corpo.
+    """
+    version = product_service.get_menu_version()
+    etag = product_service.get_menu_etag(variant, version)
+
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        raw, gz = product_service.get_menu_snapshot(variant, version)
+        if 'gzip' in request.accept_encodings:
+            response = make_response(gz, 200)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = make_response(raw, 200)
+        response.mimetype = 'application/json'
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Sempre revalida com o ETag
+    response.vary.add('Accept-Encoding')
+    return response
+
 # --- ROTAS PÚBLICAS (CLIENTE) ---
 
 @bp_menu.route('', methods=['GET'])
 @limiter.limit("200 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
 def get_menu():
     # Cliente vê apenas os disponíveis
-    products_list = product_service.get_all_products(only_available=True)
-    return jsonify(products_list), 200
+    return _menu_snapshot_response(product_service.MENU_PUBLIC)
 
 @bp_menu.route('/<int:product_id>', methods=['GET'])
 @limiter.limit("200 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
@@ -26,19 +50,19 @@ def get_product_details(product_id):
 @bp_menu.route('/lanches', methods=['GET'])
 @limiter.limit("200 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
 def get_lanches():
-    return jsonify(product_service.get_products_by_category('Lanche'))
+    return _menu_snapshot_response(product_service.menu_category_variant('Lanche'))
 
 @bp_menu.route('/combos', methods=['GET'])
 @limiter.limit("200 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
 def get_combos():
-    return jsonify(product_service.get_products_by_category('Combo'))
+    return _menu_snapshot_response(product_service.menu_category_variant('Combo'))
 
 # [NOVO] Adicione isto aqui:
 @bp_menu.route('/bebidas', methods=['GET'])
 @limiter.limit("200 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
 
 def get_bebidas():
-    return jsonify(product_service.get_products_by_category('Bebida'))
+    return _menu_snapshot_response(product_service.menu_category_variant('Bebida'))
 
 # --- ROTAS PROTEGIDAS (RESTAURANTE/ADMIN) ---
 
@@ -48,8 +72,7 @@ def get_bebidas():
 @limiter.limit("200 per hour", error_message="Muitas requisições, tente novamente mais tarde.")
 
 def get_admin_menu():
-    products_list = product_service.get_all_products(only_available=False)
-    return jsonify(products_list), 200
+    return _menu_snapshot_response(product_service.MENU_ADMIN)
 
 # 2. Criar Novo Produto
 @bp_menu.route('', methods=['POST'])
@@ -1,5 +1,6 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 from app import services
+from app.services import idempotency_service
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.schemas import order_schema
 from ..decorators import admin_required, verified_user_required
@@ -23,14 +24,41 @@ def create_order():
     if not user_id:
         return jsonify({'error': 'Usuário não autenticado.'}), 401
 
+    # 🔁 Idempotency-Key: repetições do mesmo envio devolvem a resposta original
+    idem_key = request.headers.get('Idempotency-Key')
+    if idem_key:
+        if len(idem_key) > idempotency_service.MAX_KEY_LENGTH:
+            return jsonify({'error': 'Idempotency-Key inválida.'}), 400
+
+        fingerprint = idempotency_service.fingerprint_request(request.get_data())
+        existing = idempotency_service.begin('order_create', user_id, idem_key, fingerprint)
+
+        if existing:
+            if existing['fingerprint'] != fingerprint:
+                return jsonify({'error': 'Idempotency-Key já usada com outro pedido.'}), 409
+            if existing['state'] == 'pending':
+                return jsonify({'error': 'Este pedido ainda está sendo processado.'}), 409
+
+            response = jsonify(existing['body'])
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response, existing['status']
+
     try:
         result = services.order_service.create_order_logic(user_id, data)
-        # Se for dict (MP), retorna direto. Se for objeto, faz dump.
-        if isinstance(result, dict):
-            return jsonify(result), 201
-        return jsonify(order_schema.dump(result)), 201
     except ValueError as e:
+        if idem_key:
+            idempotency_service.abort('order_create', user_id, idem_key)
         return jsonify({'error': str(e)}), 400
+    except Exception:
+        if idem_key:
+            idempotency_service.abort('order_create', user_id, idem_key)
+        raise
+
+    # Se for dict (MP), retorna direto. Se for objeto, faz dump.
+    body = result if isinstance(result, dict) else order_schema.dump(result)
+    if idem_key:
+        idempotency_service.complete('order_create', user_id, idem_key, fingerprint, 201, body)
+    return jsonify(body), 201
 
 
 @bp_orders.route('/me', methods=['GET'])
@@ -87,17 +115,54 @@ def order_for_kitchen():
         'order_id': request.args.get('order_id')
     }
 
-    # [CORREÇÃO]: Removi o bloco que forçava "Hoje" se viesse vazio.
-    # Agora, se 'start_date' for vazio, o serviço busca tudo (Histórico Completo).
+    # Sem filtros, o serviço devolve "hoje + pedidos em aberto" (visão da cozinha).
+    # Paginação por cursor: ?limit=100&cursor=<next_cursor da página anterior>
 
     try:
-        orders = services.order_service.get_filtered_orders(filters)
-        return jsonify(orders), 200
+        limit = services.order_service.parse_page_limit(request.args.get('limit'))
+        page = services.order_service.get_filtered_orders(filters, limit, request.args.get('cursor'))
+        return jsonify(page), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Erro ao filtrar pedidos: {str(e)}")  # Log no terminal para debug
         return jsonify({'error': str(e)}), 500
 
 
+@bp_orders.route('/admin/export', methods=['GET'])
+@admin_required()
+def export_orders():
+    """
+    Exporta pedidos do período (uma linha por item) em streaming.
+    ?format=csv|ndjson&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+    Filtros opcionais: status, payment_method, customer_name.
+    """
+    export_format = request.args.get('format', 'csv')
+    filters = {
+        'start_date': request.args.get('start_date'),
+        'end_date': request.args.get('end_date'),
+        'status': request.args.get('status'),
+        'customer_name': request.args.get('customer_name'),
+        'payment_method': request.args.get('payment_method'),
+    }
+
+    try:
+        chunks = services.order_service.export_orders(filters, export_format)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filename = f"pedidos_{filters['start_date']}_{filters['end_date']}.{export_format}"
+    return Response(
+        stream_with_context(chunks),
+        content_type=services.order_service.EXPORT_FORMATS[export_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no',  # Nginx: repassa os bytes sem segurar tudo
+        }
+    )
+
+
 @bp_orders.route('/<int:order_id>/status', methods=['PATCH'])
 @admin_required()
 def update_status(order_id):
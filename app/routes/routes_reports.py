@@ -1,85 +1,106 @@
 from flask import Blueprint, jsonify, request
-from app.models import Order, db
+from app.models import Order
 from app.decorators import admin_required
-from sqlalchemy import func, desc
+from app.services import report_service, report_job_service
+from flask_jwt_extended import get_jwt_identity
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 bp_reports = Blueprint('reports', __name__)
 
 
+def _parse_period(source=None):
+    """
+    Lê start_date/end_date (YYYY-MM-DD) da URL (ou do dict informado).
+    Sem start_date: últimos 30 dias. Sem end_date: só o dia de start_date.
+    Levanta ValueError se a data vier em outro formato.
+    """
+    if source is None:
+        source = request.args
+    start_date_str = source.get('start_date')
+    end_date_str = source.get('end_date')
+
+    if not start_date_str:
+        end_date = datetime.utcnow()
+        return end_date - timedelta(days=30), end_date
+
+    start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+    # Se tem data fim, usa. Se não, assume que é só um dia (start = end)
+    if end_date_str:
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+    else:
+        end_date = start_date
+    return start_date, end_date.replace(hour=23, minute=59, second=59)
+
+
 @bp_reports.route('/dashboard', methods=['GET'])
 @admin_required()
 def get_dashboard_stats():
-    # 1. Captura filtros da URL
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
     payment_method = request.args.get('payment_method')
+    try:
+        start_date, end_date = _parse_period()
+    except ValueError:
+        return jsonify({'error': 'Formato de data inválido'}), 400
 
-    # 2. Define datas padrão (Se não vier nada, pega os últimos 30 dias)
-    if not start_date_str:
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=30)
-    else:
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-            # Se tem data fim, usa. Se não, assume que é só um dia (start = end)
-            if end_date_str:
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-            else:
-                end_date = start_date.replace(hour=23, minute=59, second=59)
-        except ValueError:
-            return jsonify({'error': 'Formato de data inválido'}), 400
-
-    # 3. Query Base (Apenas pedidos CONCLUÍDOS contam como receita real)
-    query = db.session.query(Order).filter(Order.status == 'Concluído')
-
-    # Aplica filtro de data
-    query = query.filter(Order.date_created >= start_date)
-    query = query.filter(Order.date_created <= end_date)
-
-    # Aplica filtro de pagamento (se houver)
-    if payment_method:
-        query = query.filter(Order.payment_method == payment_method)
-
-    # Executa a busca
-    orders = query.order_by(Order.date_created).all()
-
-    # 4. Processamento dos Dados (Agregação)
-    total_faturado = db.session.query(func.sum(Order.total_price)) \
-                         .filter(Order.status == 'Concluído') \
-                         .filter(Order.date_created.between(start_date, end_date)) \
-                         .scalar() or 0.0  # scalar pega o valor único
-
-    # 2. Contagem Total
-    total_pedidos = db.session.query(func.count(Order.id)) \
-                        .filter(Order.status == 'Concluído') \
-                        .filter(Order.date_created.between(start_date, end_date)) \
-                        .scalar() or 0
-
-    # 3. Gráfico (Agrupado por Dia no SQL)
-    # Isso evita trazer milhares de linhas para o Python
-    # (Sintaxe para SQLite/Postgres pode variar um pouco na extração de data,
-    #  abaixo um exemplo genérico compatível com a maioria via func.date)
-    stats_by_day = db.session.query(
-        func.date(Order.date_created),
-        func.sum(Order.total_price)
-    ).filter(
-        Order.status == 'Concluído',
-        Order.date_created.between(start_date, end_date)
-    ).group_by(func.date(Order.date_created)).all()
-
-    # Monta o JSON
-    labels = [str(day) for day, _ in stats_by_day]
-    data_values = [float(amount) for _, amount in stats_by_day]
-
-    return jsonify({
-        "total_periodo": float(total_faturado),
-        "qtd_pedidos": total_pedidos,
-        "grafico": {"labels": labels, "data": data_values},
-        "periodo_info": "..."
-    }), 200
+    # Lê do rollup diário (1 linha por dia/pagamento, não por pedido)
+    start_day, end_day = start_date.date(), end_date.date()
+    stats = report_service.run_report('dashboard', start_day, end_day, {'payment_method': payment_method})
+
+    return jsonify({**stats, "periodo_info": "..."}), 200
+
+
+@bp_reports.route('/products', methods=['GET'])
+@admin_required()
+def get_product_sales_stats():
+    """Vendas por produto, categoria e hora do dia, com taxa de adicionais."""
+    try:
+        start_date, end_date = _parse_period()
+    except ValueError:
+        return jsonify({'error': 'Formato de data inválido'}), 400
+
+    start_day, end_day = start_date.date(), end_date.date()
+    stats = report_service.run_report('products', start_day, end_day)
+    return jsonify(stats), 200
+
+
+@bp_reports.route('/jobs', methods=['POST'])
+@admin_required()
+def create_report_job():
+    """
+    Relatório pesado (ex: um ano inteiro) sem prender o worker:
+    devolve 202 com o job_id na hora; o cliente consulta GET /jobs/<id>.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        start_date, end_date = _parse_period(data)
+        job = report_job_service.submit_job(
+            data.get('report', 'dashboard'),
+            start_date.date(),
+            end_date.date(),
+            filters=data,
+            requested_by=get_jwt_identity()
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if job is None:
+        return jsonify({'error': 'Fila de relatórios cheia. Tente novamente em instantes.'}), 503
+
+    return jsonify({**job, "status_url": f"/api/reports/jobs/{job['id']}"}), 202
+
+
+@bp_reports.route('/jobs/<job_id>', methods=['GET'])
+@admin_required()
+def get_report_job(job_id):
+    job = report_job_service.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job não encontrado ou expirado'}), 404
+    return jsonify(job), 200
+
+
+@bp_reports.route('/cache-stats', methods=['GET'])
+@admin_required()
+def get_report_cache_stats():
+    return jsonify(report_service.get_report_cache_stats()), 200
 
 
 # Rota para o Dossiê (Continua igual, mas precisa estar aqui)
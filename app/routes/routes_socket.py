@@ -0,0 +1,45 @@
+from flask_socketio import join_room, emit
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from app.extensions import socketio
+from app.services.identity_service import get_identity
+from app.utils.rooms import ADMINS_ROOM, ADMIN_ROLES, user_room
+
+
+def _join_user_rooms():
+    """
+    Lê o cookie JWT do handshake e coloca o socket nas salas do usuário.
+    Retorna False para visitante sem login (ou com token vencido).
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        return False
+
+    if not user_id:
+        return False
+
+    user = get_identity(user_id)
+    if not user:
+        return False
+
+    join_room(user_room(user['id']))
+    if user['role'] in ADMIN_ROLES:
+        join_room(ADMINS_ROOM)
+    return True
+
+
+@socketio.on('connect')
+def handle_connect(auth=None):
+    """
+    Visitante sem login continua conectado, mas só recebe os eventos
+    públicos (ex: product_toggle).
+    As salas valem para a conexão inteira: o cookie dos eventos seguintes é
+    sempre o do handshake. Por isso o cliente (static/js/socket.js) refaz a
+    conexão depois de login, logout e refresh do token, e o evento 'session'
+    avisa quando o handshake chegou sem token válido (ex: cookie de acesso
+    vencido ao abrir a página), para o cliente renovar e reconectar.
+    """
+    emit('session', {"authenticated": _join_user_rooms()})
@@ -26,6 +26,8 @@ class ProductSchema(ma.SQLAlchemyAutoSchema):
         model = Product
         load_instance = True
         sqla_session = db.session
+        # Controle interno do motor de estoque (stock_service), não é do cardápio
+        exclude = ('stock_version',)
 
 
 # 3. Schema do Item de Pedido
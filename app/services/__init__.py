@@ -1,6 +1,11 @@
 # Isso permite importar assim: "from app.services import auth_service"
 from . import product_service
+from . import stock_service
+from . import report_service
+from . import report_job_service
 from . import order_service
+from . import identity_service
+from . import coment_service
 from . import auth_service
 from . import payment_service
 from . import address_service
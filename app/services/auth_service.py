@@ -4,13 +4,14 @@ import datetime
 import os
 import bleach
 import secrets
-from app.models import User, Order, ChatMessage, Coments, db
+from app.models import User, Order, ChatMessage, Conversation, db
 from flask_jwt_extended import (
     create_access_token,
     decode_token, 
     create_refresh_token as lib_create_refresh_token
     )
 from app.services.email_services import send_verification_email, send_magic_link_email
+from app.services import coment_service, identity_service
 
 
 # --- FUNÇÃO AUXILIAR DE VALIDAÇÃO ---
@@ -207,6 +208,7 @@ def update_user_info(user_id, data):
     if not user:
         raise ValueError("Usuário não encontrado.")
 
+    renamed = 'name' in data and data['name'].strip() != user.name
     if 'name' in data: user.name = data['name'].strip()
     
     if 'whatsapp' in data:
@@ -229,7 +231,13 @@ def update_user_info(user_id, data):
 
         user.password_hash = generate_password_hash(password)
 
+    if renamed:
+        # O nome do autor faz parte do índice de busca das avaliações
+        db.session.flush()
+        coment_service.sync_search_index(user_id=user.id)
+
     db.session.commit()
+    identity_service.invalidate_identity(user.id)
 
     # Busca o endereço ativo para retornar junto
     active_address = None
@@ -344,6 +352,7 @@ def login_with_google(token):
         if not user.is_verified:
             user.is_verified = True
             db.session.commit()
+            identity_service.invalidate_identity(user.id)
     return user
 
 
@@ -371,6 +380,7 @@ def confirmar_email(token):
         if not user.is_verified:
             user.is_verified = True
             db.session.commit()
+            identity_service.invalidate_identity(user.id)
 
         # Gera token de login real para o usuário já entrar logado
         # (Nota: login_token é o token de sessão que vai pro cookie)
@@ -470,7 +480,8 @@ def delete_user(user_id):
         # (Se o Address tiver cascade='all, delete-orphan' no model User, o SQLAlchemy deleta sozinho, 
         # mas Chat e Coments geralmente precisam de atenção manual se não configurados).
         ChatMessage.query.filter_by(user_id=user.id).delete()
-        Coments.query.filter_by(user_id=user.id).delete()
+        Conversation.query.filter_by(user_id=user.id).delete()
+        coment_service.remove_user_ratings(user.id)  # Também desconta do resumo das notas
         
         # O model User já tem cascade para Address, então não precisa deletar Address manualmente 
         # se 'cascade="all, delete-orphan"' estiver correto no model.py.
@@ -478,6 +489,8 @@ def delete_user(user_id):
         # 3. DELEÇÃO DO USUÁRIO
         db.session.delete(user)
         db.session.commit()
+        coment_service.invalidate_rating_stats()
+        identity_service.invalidate_identity(user_id)
 
         return {
             "sucesso": True, 
@@ -1,16 +1,110 @@
-from ..models import ChatMessage, db, User
+from ..models import ChatMessage, Conversation, db, User
 from ..schemas import chat_messages_schema, chat_message_schema
-from datetime import datetime, timedelta
-from sqlalchemy import func
+from datetime import datetime
+from sqlalchemy import func, delete, select, or_, and_
 from ..extensions import socketio
+from ..utils.upsert import upsert_insert
+from ..utils.cache import get_redis, LocalTTLCache
+from ..utils.rooms import ADMINS_ROOM, user_room
+from ..utils.moderation import moderation
+from collections import deque
 import bleach
-try:
-    from ..utils.bad_words import BLOCKLIST
-except ImportError:
-    BLOCKLIST = set() # Evita erro se o arquivo não existir
+import base64
+import time
+import uuid
 
 SPAM_COOLDOWN_SECONDS = 2  # Tempo mínimo entre mensagens
+SEND_WINDOW_SECONDS = 60  # Janela deslizante do limite de mensagens
+SEND_WINDOW_MAX_MESSAGES = 15  # Máximo de mensagens do cliente por janela
 MAX_HISTORY_CHARS = 20000  # Limite de caracteres no histórico
+DEFAULT_CHAT_PAGE = 50  # Mensagens por página do histórico
+MAX_CHAT_PAGE = 200
+PREVIEW_CHARS = 120  # Prévia da última mensagem na caixa de entrada
+DEFAULT_INBOX_PAGE = 50
+MAX_INBOX_PAGE = 200
+
+# ==============================================================================
+# 🚦 ANTI-SPAM (Redis, ou memória local em Dev)
+# ==============================================================================
+# Chaves:
+#   chat:cooldown:<user_id> -> SET NX PX: existe enquanto o cooldown não passou
+#   chat:window:<user_id>   -> ZSET com o horário (ms) de cada mensagem aceita na janela
+# O script roda atômico no Redis: duas abas do mesmo cliente não furam o limite.
+COOLDOWN_KEY = 'chat:cooldown:{}'
+WINDOW_KEY = 'chat:window:{}'
+
+SEND_RATE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return {'cooldown', 0}
+end
+
+local now = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - window_ms)
+if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[4]) then
+    local oldest = redis.call('ZRANGE', KEYS[2], 0, 0, 'WITHSCORES')
+    return {'window', tonumber(oldest[2]) + window_ms - now}
+end
+
+if tonumber(ARGV[2]) > 0 then
+    redis.call('SET', KEYS[1], 1, 'NX', 'PX', ARGV[2])
+end
+redis.call('ZADD', KEYS[2], now, ARGV[5])
+redis.call('PEXPIRE', KEYS[2], window_ms)
+return {'ok', 0}
+"""
+
+_local_cooldowns = LocalTTLCache(maxsize=10000)
+_local_windows = LocalTTLCache(maxsize=10000)  # {user_id: deque([horário, ...])}
+
+
+def _check_send_rate(user_id):
+    """
+    Levanta ValueError se o cliente estiver no cooldown ou já tiver mandado
+    SEND_WINDOW_MAX_MESSAGES mensagens nos últimos SEND_WINDOW_SECONDS.
+    Se passar, já registra esta mensagem no cooldown e na janela.
+    """
+    redis = get_redis()
+    if redis:
+        now_ms = int(time.time() * 1000)
+        status, wait_ms = redis.eval(
+            SEND_RATE_LUA, 2,
+            COOLDOWN_KEY.format(user_id), WINDOW_KEY.format(user_id),
+            now_ms, SPAM_COOLDOWN_SECONDS * 1000, SEND_WINDOW_SECONDS * 1000,
+            SEND_WINDOW_MAX_MESSAGES, f"{now_ms}-{uuid.uuid4().hex[:8]}"
+        )
+        status = status.decode() if isinstance(status, bytes) else status
+        wait_seconds = int(wait_ms) / 1000
+    else:
+        status, wait_seconds = _check_send_rate_local(user_id)
+
+    if status == 'cooldown':
+        raise ValueError("Você está enviando mensagens muito rápido. Aguarde um momento.")
+    if status == 'window':
+        raise ValueError(
+            f"Muitas mensagens em pouco tempo. Aguarde {max(1, round(wait_seconds))} segundos."
+        )
+
+
+def _check_send_rate_local(user_id):
+    """Mesma regra do SEND_RATE_LUA, por processo (sem REDIS_URI)."""
+    if _local_cooldowns.get(user_id):
+        return 'cooldown', 0
+
+    now = time.monotonic()
+    window = _local_windows.get(user_id) or deque()
+    while window and window[0] <= now - SEND_WINDOW_SECONDS:
+        window.popleft()
+    if len(window) >= SEND_WINDOW_MAX_MESSAGES:
+        return 'window', window[0] + SEND_WINDOW_SECONDS - now
+
+    if SPAM_COOLDOWN_SECONDS > 0:
+        _local_cooldowns.set(user_id, True, SPAM_COOLDOWN_SECONDS)
+    window.append(now)
+    _local_windows.set(user_id, window, SEND_WINDOW_SECONDS)
+    return 'ok', 0
+
+
 def send_message_logic(user_id, text, is_admin=False):
     """
     Salva uma nova mensagem com validação, sanitização e resposta automática.
@@ -27,28 +121,14 @@ def send_message_logic(user_id, text, is_admin=False):
     clean_text = bleach.clean(text, tags=[], strip=True, attributes={}).strip()
 
     # 3. Filtro de Palavras Impróprias
-    palavras_mensagem = set(clean_text.lower().split())
-    if BLOCKLIST.intersection(palavras_mensagem):
+    if moderation.contains(clean_text):
         # CORREÇÃO: Lança erro em vez de retornar tupla HTTP
         raise ValueError("Seu comentário contém palavras impróprias. Por favor, seja respeitoso.")
 
-    # 4. Verificação de Spam (Cooldown)
-    # Verifica apenas se há uma mensagem anterior
-    last_msg = ChatMessage.query.filter_by(user_id=user_id) \
-        .order_by(ChatMessage.timestamp.desc()) \
-        .first()
-
-    if last_msg and not is_admin:
-        time_diff = datetime.utcnow() - last_msg.timestamp
-        if time_diff.total_seconds() < SPAM_COOLDOWN_SECONDS:
-            raise ValueError("Você está enviando mensagens muito rápido. Aguarde um momento.")
-
-    # 5. Lógica de Primeira Mensagem
-    is_first_message = False
+    # 4. Verificação de Spam (Cooldown + limite por janela)
+    # Redis/memória: mensagem recusada não encosta no banco
     if not is_admin:
-        # Dica de Performance: Se last_msg for None, count é 0. Não precisa fazer query de count.
-        if not last_msg: 
-            is_first_message = True
+        _check_send_rate(user_id)
 
     # 6. Persistência
     try:
@@ -59,22 +139,29 @@ def send_message_logic(user_id, text, is_admin=False):
             timestamp=datetime.utcnow()
         )
         db.session.add(new_msg)
+        total_chars = _record_in_conversation(new_msg)
         db.session.commit()
+
+        # 5. Primeira Mensagem: o UPSERT acabou de criar a conversa
+        # (contador == tamanho desta mensagem). Sem SELECT extra.
+        is_first_message = not is_admin and total_chars == len(new_msg.message)
     except Exception as e:
         db.session.rollback()
         print(f"❌ Erro ao salvar mensagem: {e}")
         raise ValueError("Erro interno ao salvar mensagem.")
 
     # 7. Pós-processamento
-    if not is_admin:
+    if not is_admin and total_chars > MAX_HISTORY_CHARS:
         try:
             _enforce_storage_limit(user_id)
         except Exception as e:
+            db.session.rollback()
             print(f"⚠️ Erro ao limpar histórico antigo: {e}")
 
     msg_dump = chat_message_schema.dump(new_msg)
     print(f"📡 Nova mensagem chat (User {user_id})")
-    socketio.emit('chat_message', msg_dump)
+    # Só o próprio cliente e os admins recebem (antes ia para todo mundo)
+    socketio.emit('chat_message', msg_dump, to=[user_room(user_id), ADMINS_ROOM])
 
     # 8. Resposta Automática (Bot)
     if is_first_message:
@@ -95,10 +182,11 @@ def send_message_logic(user_id, text, is_admin=False):
                 timestamp=datetime.utcnow()
             )
             db.session.add(auto_reply)
+            _record_in_conversation(auto_reply)
             db.session.commit()
 
             bot_msg_dump = chat_message_schema.dump(auto_reply)
-            socketio.emit('chat_message', bot_msg_dump)
+            socketio.emit('chat_message', bot_msg_dump, to=[user_room(user_id), ADMINS_ROOM])
         except Exception as e:
             print(f"❌ Erro ao enviar resposta automática: {e}")
             # Não damos raise aqui para não cancelar a mensagem do usuário que já foi salva
@@ -106,79 +194,178 @@ def send_message_logic(user_id, text, is_admin=False):
     return msg_dump
 
 
-def get_user_messages_logic(user_id):
+def get_user_messages_logic(user_id, before_id=None, after_id=None, limit=DEFAULT_CHAT_PAGE):
     """
-    Busca todo o histórico de conversa de um usuário.
+    Histórico de conversa de um usuário, paginado (ver _history_page).
     Ordenado por data (mais antigo primeiro).
     """
-    messages = ChatMessage.query.filter_by(user_id=user_id) \
-        .order_by(ChatMessage.timestamp.asc()) \
-        .all()
+    return _history_page(user_id, before_id, after_id, limit)
 
-    return chat_messages_schema.dump(messages)
 
-
-def _enforce_storage_limit(user_id):
+def _history_page(user_id, before_id=None, after_id=None, limit=DEFAULT_CHAT_PAGE):
     """
-    Função interna: Verifica o tamanho total das mensagens do usuário.
-    Se passar de MAX_HISTORY_CHARS, deleta as mais antigas.
+    Página do histórico na ordem (timestamp, id), sempre do mais antigo para o mais novo.
+    - Sem cursor: as `limit` mensagens mais recentes (abrir o chat).
+    - before_id: as `limit` mensagens imediatamente anteriores (rolar para cima).
+    - after_id: só as mensagens novas depois dela (atualização incremental).
+    Levanta ValueError se o cursor não for uma mensagem desta conversa.
     """
-    # Busca todas as mensagens do usuário (ordenadas da mais antiga para a nova)
-    messages = ChatMessage.query.filter_by(user_id=user_id) \
-        .order_by(ChatMessage.timestamp.asc()) \
-        .all()
+    if before_id and after_id:
+        raise ValueError("Use before_id OU after_id, não os dois.")
 
-    total_chars = sum(len(m.message) for m in messages)
+    query = ChatMessage.query.filter(ChatMessage.user_id == user_id)
+    anchor_id = after_id or before_id
 
-    if total_chars > MAX_HISTORY_CHARS:
-        print(f"🧹 Limpando histórico do usuário {user_id} (Total: {total_chars} chars)...")
+    if anchor_id:
+        anchor_time = db.session.query(ChatMessage.timestamp) \
+            .filter(ChatMessage.id == anchor_id, ChatMessage.user_id == user_id) \
+            .scalar()
+        if anchor_time is None:
+            raise ValueError("Mensagem de referência não encontrada.")
 
-        # Deleta mensagens antigas até baixar do limite
-        chars_removed = 0
-        for msg in messages:
-            if total_chars - chars_removed <= MAX_HISTORY_CHARS:
-                break  # Já limpou o suficiente
+        if after_id:
+            messages = query.filter(or_(
+                ChatMessage.timestamp > anchor_time,
+                and_(ChatMessage.timestamp == anchor_time, ChatMessage.id > after_id)
+            )).order_by(ChatMessage.timestamp.asc(), ChatMessage.id.asc()).limit(limit).all()
+            return chat_messages_schema.dump(messages)
 
-            chars_removed += len(msg.message)
-            db.session.delete(msg)
+        query = query.filter(or_(
+            ChatMessage.timestamp < anchor_time,
+            and_(ChatMessage.timestamp == anchor_time, ChatMessage.id < before_id)
+        ))
+
+    # Pega as mais novas primeiro (usa o índice de trás pra frente) e desvira
+    messages = query.order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc()).limit(limit).all()
+    return chat_messages_schema.dump(list(reversed(messages)))
 
-        db.session.commit()
+
+def _record_in_conversation(msg):
+    """
+    Atualiza a linha da conversa com a mensagem nova (cria se não existir):
+    caracteres guardados, data/prévia da última mensagem e o contador de
+    não lidas do OUTRO lado. Roda na transação de quem chamou e devolve o
+    total de caracteres atualizado.
+    """
+    from_admin = bool(msg.is_from_admin)
+    values = {
+        'user_id': msg.user_id,
+        'total_chars': len(msg.message),
+        'last_message_at': msg.timestamp,
+        'last_message_preview': msg.message[:PREVIEW_CHARS],
+        'unread_by_admin': 0 if from_admin else 1,
+        'unread_by_user': 1 if from_admin else 0,
+    }
+
+    stmt = upsert_insert(Conversation).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={
+            'total_chars': Conversation.total_chars + stmt.excluded.total_chars,
+            'last_message_at': stmt.excluded.last_message_at,
+            'last_message_preview': stmt.excluded.last_message_preview,
+            'unread_by_admin': Conversation.unread_by_admin + stmt.excluded.unread_by_admin,
+            'unread_by_user': Conversation.unread_by_user + stmt.excluded.unread_by_user,
+        }
+    ).returning(Conversation.total_chars)
+    return db.session.execute(stmt).scalar_one()
 
 
-def get_conversations_summary_logic():
+def _enforce_storage_limit(user_id):
     """
-    Retorna lista de usuários que já mandaram mensagem,
-    ordenada por quem mandou mensagem mais recente.
+    Função interna: se o histórico passou de MAX_HISTORY_CHARS, apaga as
+    mensagens mais antigas com UM delete. A soma acumulada (da mais nova
+    para a mais antiga) diz quais mensagens não cabem mais no limite.
+    Como o histórico nunca passa muito do limite, o custo não cresce com o
+    tamanho da conversa.
     """
-    # Subquery para pegar a data da última mensagem de cada usuário
-    last_msg_sub = db.session.query(
-        ChatMessage.user_id,
-        func.max(ChatMessage.timestamp).label('last_time')
-    ).group_by(ChatMessage.user_id).subquery()
+    running = select(
+        ChatMessage.id,
+        func.sum(func.length(ChatMessage.message)).over(
+            order_by=(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+        ).label('running_chars')
+    ).where(ChatMessage.user_id == user_id).subquery()
+
+    overflow = select(running.c.id).where(running.c.running_chars > MAX_HISTORY_CHARS)
 
-    # Join com a tabela de usuários para pegar o nome
-    results = db.session.query(User, last_msg_sub.c.last_time) \
-        .join(last_msg_sub, User.id == last_msg_sub.c.user_id) \
-        .order_by(last_msg_sub.c.last_time.desc()) \
+    removed = db.session.execute(
+        delete(ChatMessage)
+        .where(ChatMessage.id.in_(overflow))
+        .returning(func.length(ChatMessage.message))
+    ).scalars().all()
+
+    if removed:
+        print(f"🧹 Limpando histórico do usuário {user_id} ({len(removed)} mensagens, {sum(removed)} chars)...")
+        Conversation.query.filter_by(user_id=user_id) \
+            .update({Conversation.total_chars: Conversation.total_chars - sum(removed)}, synchronize_session=False)
+    db.session.commit()
+
+
+def get_conversations_summary_logic(limit=DEFAULT_INBOX_PAGE, cursor=None):
+    """
+    Caixa de entrada do admin: conversas da mais recente para a mais antiga,
+    paginada por cursor (last_message_at, user_id).
+    Retorna {"conversations": [...], "next_cursor": str|None}.
+    """
+    query = db.session.query(Conversation, User.name) \
+        .join(User, User.id == Conversation.user_id) \
+        .filter(Conversation.last_message_at.isnot(None))
+
+    if cursor:
+        cursor_time, cursor_user = _decode_inbox_cursor(cursor)
+        query = query.filter(or_(
+            Conversation.last_message_at < cursor_time,
+            and_(Conversation.last_message_at == cursor_time, Conversation.user_id < cursor_user)
+        ))
+
+    # Busca 1 a mais só para saber se existe próxima página
+    rows = query.order_by(Conversation.last_message_at.desc(), Conversation.user_id.desc()) \
+        .limit(limit + 1) \
         .all()
 
     conversations = []
-    for user, last_time in results:
+    for conversation, user_name in rows[:limit]:
         conversations.append({
-            "user_id": user.id,
-            "user_name": user.name,
-            "last_interaction": last_time.isoformat()
+            "user_id": conversation.user_id,
+            "user_name": user_name,
+            "last_interaction": conversation.last_message_at.isoformat(),
+            "last_message_preview": conversation.last_message_preview,
+            "unread_by_admin": conversation.unread_by_admin,
+            "unread_by_user": conversation.unread_by_user,
         })
 
-    return conversations
+    next_cursor = None
+    if len(rows) > limit:
+        last = conversations[-1]
+        next_cursor = _encode_inbox_cursor(last["last_interaction"], last["user_id"])
 
+    return {"conversations": conversations, "next_cursor": next_cursor}
 
-def get_admin_chat_history_logic(target_user_id):
+
+def _encode_inbox_cursor(last_interaction, user_id):
+    return base64.urlsafe_b64encode(f"{last_interaction}|{user_id}".encode()).decode()
+
+
+def _decode_inbox_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, user_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(date_str), int(user_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Cursor de paginação inválido.")
+
+
+def mark_conversation_read_logic(user_id, by_admin):
+    """Zera as não lidas de um lado da conversa (admin abriu o chat / cliente abriu o widget)."""
+    column = Conversation.unread_by_admin if by_admin else Conversation.unread_by_user
+    Conversation.query.filter_by(user_id=user_id) \
+        .update({column: 0}, synchronize_session=False)
+    db.session.commit()
+    return {"user_id": int(user_id), column.key: 0}
+
+
+def get_admin_chat_history_logic(target_user_id, before_id=None, after_id=None, limit=DEFAULT_CHAT_PAGE):
     """
-    Pega o histórico completo entre o restaurante e um usuário específico.
+    Histórico entre o restaurante e um usuário específico, paginado (ver _history_page).
     """
-    messages = ChatMessage.query.filter_by(user_id=target_user_id) \
-        .order_by(ChatMessage.timestamp.asc()) \
-        .all()
-
-    return chat_messages_schema.dump(messages)
\ No newline at end of file
+    return _history_page(target_user_id, before_id, after_id, limit)
\ No newline at end of file
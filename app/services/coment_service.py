@@ -1,11 +1,136 @@
-from ..models import Coments, User
+from ..models import Coments, User, RatingStats
 from ..extensions import db
+from sqlalchemy import func, or_, and_, text
+from datetime import datetime
+import base64
+import json
+import re
 import bleach
+from ..utils.moderation import moderation
+from ..utils.cache import get_redis, LocalTTLCache
+from ..utils.upsert import upsert_insert
 
-try:
-    from ..utils.bad_words import BLOCKLIST
-except ImportError:
-    BLOCKLIST = set() # Evita erro se o arquivo não existir
+# ==============================================================================
+# ⭐ RESUMO DAS AVALIAÇÕES (Média + Histograma)
+# ==============================================================================
+# RatingStats (linha única) é atualizado na MESMA transação de cada avaliação
+# criada, editada ou apagada. A rota /stats lê do cache (Redis ou memória
+# local); o cache é apagado depois de cada commit que mexe nas notas.
+RATING_STATS_ID = 1
+RATING_STATS_KEY = 'rating:stats'
+RATING_STATS_TTL = 60 * 10  # Segurança extra: mesmo sem invalidação, expira
+VALID_STARS = range(1, 6)
+
+_local_stats_cache = LocalTTLCache(maxsize=1)
+
+
+def _apply_rating_changes(changes):
+    """
+    changes: {nota: +n / -n}. Ex: editar de 2 para 5 estrelas -> {2: -1, 5: 1}.
+    NÃO faz commit. UPSERT atômico: avaliações simultâneas não perdem soma.
+    """
+    changes = {stars: delta for stars, delta in changes.items() if delta}
+    if not changes:
+        return
+
+    values = {
+        'id': RATING_STATS_ID,
+        'review_count': sum(changes.values()),
+        'stars_sum': sum(stars * delta for stars, delta in changes.items()),
+        **{f'stars_{stars}': changes.get(stars, 0) for stars in VALID_STARS}
+    }
+    stmt = upsert_insert(RatingStats).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['id'],
+        set_={
+            column: getattr(RatingStats, column) + getattr(stmt.excluded, column)
+            for column in values if column != 'id'
+        }
+    )
+    db.session.execute(stmt)
+
+
+def invalidate_rating_stats():
+    """Chamar sempre DEPOIS do commit."""
+    _local_stats_cache.delete(RATING_STATS_KEY)
+    redis = get_redis()
+    if redis:
+        try:
+            redis.delete(RATING_STATS_KEY)
+        except Exception as e:
+            print(f"⚠️ Erro ao invalidar resumo das avaliações: {e}")
+
+
+def _stats_to_dict(row):
+    count = row.review_count if row else 0
+    return {
+        "count": count,
+        "average": round(row.stars_sum / count, 2) if count else None,
+        "histogram": {str(stars): getattr(row, f'stars_{stars}') if row else 0 for stars in VALID_STARS}
+    }
+
+
+def get_rating_stats():
+    """{count, average, histogram: {"1": n, ..., "5": n}} — leitura por chave + cache."""
+    cached = _local_stats_cache.get(RATING_STATS_KEY)
+    if cached is not None:
+        return cached
+
+    redis = get_redis()
+    if redis:
+        try:
+            raw = redis.get(RATING_STATS_KEY)
+            if raw:
+                return json.loads(raw)
+        except Exception as e:
+            print(f"⚠️ Redis indisponível para o resumo das avaliações: {e}")
+            redis = None
+
+    stats = _stats_to_dict(db.session.get(RatingStats, RATING_STATS_ID))
+
+    if redis:
+        try:
+            redis.set(RATING_STATS_KEY, json.dumps(stats), ex=RATING_STATS_TTL)
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar resumo das avaliações no Redis: {e}")
+    else:
+        _local_stats_cache.set(RATING_STATS_KEY, stats, RATING_STATS_TTL)
+    return stats
+
+
+def remove_user_ratings(user_id):
+    """
+    Apaga todas as avaliações do usuário (exclusão de conta) descontando do
+    resumo e tirando do índice de busca. NÃO faz commit: roda dentro da transação de quem chamou.
+    Quem chamou deve invalidar o cache depois do commit.
+    """
+    per_star = db.session.query(Coments.stars, func.count(Coments.id)) \
+        .filter(Coments.user_id == user_id) \
+        .group_by(Coments.stars) \
+        .all()
+    _apply_rating_changes({stars: -count for stars, count in per_star})
+    remove_from_search_index(user_id=user_id)
+    Coments.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+
+def rebuild_rating_stats():
+    """Backfill: recalcula o resumo a partir de todas as avaliações. Retorna o total."""
+    per_star = dict(db.session.query(Coments.stars, func.count(Coments.id)).group_by(Coments.stars).all())
+    try:
+        db.session.query(RatingStats).delete(synchronize_session=False)
+        db.session.add(RatingStats(
+            id=RATING_STATS_ID,
+            review_count=sum(per_star.values()),
+            stars_sum=sum(stars * count for stars, count in per_star.items()),
+            **{f'stars_{stars}': per_star.get(stars, 0) for stars in VALID_STARS}
+        ))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    invalidate_rating_stats()
+    return sum(per_star.values())
 
 
 def create_coment(dados, user_id):
@@ -21,8 +146,7 @@ def create_coment(dados, user_id):
   if not coment:
         return {"error": "O comentário não pode estar vazio."}, 400
   
-  palavras_comentario = set(coment.lower().split())
-  if BLOCKLIST.intersection(palavras_comentario):
+  if moderation.contains(coment):
     return {"error": "Seu comentário contém palavras impróprias. Por favor, seja respeitoso."}, 400
   
   stars = dados.get('stars')
@@ -48,63 +172,267 @@ def create_coment(dados, user_id):
 
   try:
     db.session.add(novo_comentario)
+    db.session.flush()  # Pega o id para o índice de busca
+    sync_search_index(review_id=novo_comentario.id)
+    _apply_rating_changes({stars: 1})
     db.session.commit()
+    invalidate_rating_stats()
     return {"msg": "Avaliação enviada com sucesso!"}, 201
   except Exception as e:
     db.session.rollback()
     return {"error": "Erro ao salvar avaliação"}, 500
   
 
-def get_all_coments(order='recent'):
+REVIEW_ORDERS = ('recent', 'stars_desc', 'stars_asc')
+DEFAULT_REVIEWS_PAGE = 30
+MAX_REVIEWS_PAGE = 100
+
+# Só as colunas que o card/tabela usam + nome do autor, num único JOIN
+# (o to_dict() fazia um SELECT de User por avaliação)
+REVIEW_COLUMNS = (
+    Coments.id, Coments.user_id, Coments.coment, Coments.stars, Coments.timestamp,
+    User.name.label('author'),
+)
+
+
+def _review_dict(row):
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "author": row.author or "Usuário Desconhecido",
+        "coment": row.coment,
+        "stars": row.stars,
+        "date": row.timestamp.strftime("%d/%m/%Y %H:%M")  # Formata a data para BR
+    }
+
+
+def _encode_review_cursor(order, row):
+    raw = f"{order}|{row.stars}|{row.timestamp.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_review_cursor(cursor, order):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        cursor_order, stars, timestamp, review_id = raw.split('|')
+        if cursor_order != order:
+            raise ValueError
+        return int(stars), datetime.fromisoformat(timestamp), int(review_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Cursor de paginação inválido.")
+
+
+def get_all_coments(order='recent', limit=DEFAULT_REVIEWS_PAGE, cursor=None):
     """
-    Busca comentários com ordenação dinâmica.
+    Busca comentários com ordenação dinâmica, paginados por cursor (keyset).
     order: 'stars_asc' (1-5), 'stars_desc' (5-1), 'recent' (Padrão)
+    Dentro da mesma nota, os mais recentes primeiro (desempate pelo id).
+    Retorna {"reviews": [...], "next_cursor": str|None}.
     """
-    query = Coments.query
+    if order not in REVIEW_ORDERS:
+        order = 'recent'
+
+    query = db.session.query(*REVIEW_COLUMNS).outerjoin(User, User.id == Coments.user_id)
+
+    if cursor:
+        stars, timestamp, review_id = _decode_review_cursor(cursor, order)
+        # Posição dentro da mesma nota: (timestamp, id) decrescente
+        after_in_group = or_(
+            Coments.timestamp < timestamp,
+            and_(Coments.timestamp == timestamp, Coments.id < review_id)
+        )
+        if order == 'stars_desc':
+            query = query.filter(or_(Coments.stars < stars, and_(Coments.stars == stars, after_in_group)))
+        elif order == 'stars_asc':
+            query = query.filter(or_(Coments.stars > stars, and_(Coments.stars == stars, after_in_group)))
+        else:
+            query = query.filter(after_in_group)
 
     if order == 'stars_desc':
         # Melhores avaliações primeiro (5 -> 1)
-        query = query.order_by(Coments.stars.desc(), Coments.timestamp.desc())
+        query = query.order_by(Coments.stars.desc(), Coments.timestamp.desc(), Coments.id.desc())
     elif order == 'stars_asc':
         # Piores avaliações primeiro (1 -> 5)
-        query = query.order_by(Coments.stars.asc(), Coments.timestamp.desc())
+        query = query.order_by(Coments.stars.asc(), Coments.timestamp.desc(), Coments.id.desc())
     else:
         # Padrão: Mais recentes primeiro
-        query = query.order_by(Coments.timestamp.desc())
+        query = query.order_by(Coments.timestamp.desc(), Coments.id.desc())
+
+    # Busca 1 a mais só para saber se existe próxima página
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = _encode_review_cursor(order, rows[limit - 1]) if len(rows) > limit else None
+    return {"reviews": [_review_dict(row) for row in rows[:limit]], "next_cursor": next_cursor}
+
+# ==============================================================================
+# 🔎 BUSCA TEXTUAL (texto da avaliação + nome do autor)
+# ==============================================================================
+# Postgres: coluna coments.search_vector (tsvector) com índice GIN.
+# SQLite (Dev): tabela virtual FTS5 coments_fts (rowid = coments.id).
+# Os dois são criados por DDL próprio (COMENTS_SEARCH_DDL em models.py) e
+# atualizados aqui, na mesma transação de quem cria/edita/apaga avaliações.
+# A busca só lê o índice: o custo acompanha quantas avaliações casam com o
+# termo, não o total de avaliações.
+DEFAULT_SEARCH_PAGE = 20
+MAX_SEARCH_PAGE = 100
+MAX_SEARCH_TERMS = 8
+
+_SEARCH_TERM = re.compile(r'[^\W_]+')
+
+# Postgres sem a extensão unaccent: os acentos saem no próprio SQL (texto e busca)
+_PG_FOLD = "translate(lower({}), 'áàâãäéèêëíìîïóòôõöúùûüç', 'aaaaaeeeeiiiiooooouuuuc')"
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('portuguese', " + _PG_FOLD.format("coalesce(coments.coment, '')") + "), 'A') || "
+    "setweight(to_tsvector('portuguese', " + _PG_FOLD.format('coalesce("user".name, \'\')') + "), 'B')"
+)
+
+_SEARCH_INDEX_SQL = {
+    'postgresql': {
+        'sync': [
+            'UPDATE coments SET search_vector = ' + _PG_DOCUMENT +
+            ' FROM "user" WHERE "user".id = coments.user_id AND coments.{column} = :value',
+        ],
+        'remove': [],  # O vetor mora na própria linha: sai junto com ela
+        'search': (
+            "SELECT coments.id AS id, CAST(ts_rank(coments.search_vector, query) AS double precision) AS score "
+            "FROM coments, to_tsquery('portuguese', " + _PG_FOLD.format(':terms') + ") AS query "
+            "WHERE coments.search_vector @@ query"
+        ),
+    },
+    'sqlite': {
+        'sync': [
+            'DELETE FROM coments_fts WHERE rowid IN (SELECT id FROM coments WHERE coments.{column} = :value)',
+            'INSERT INTO coments_fts (rowid, coment, author) '
+            'SELECT coments.id, coments.coment, "user".name FROM coments '
+            'LEFT JOIN "user" ON "user".id = coments.user_id WHERE coments.{column} = :value',
+        ],
+        'remove': [
+            'DELETE FROM coments_fts WHERE rowid IN (SELECT id FROM coments WHERE coments.{column} = :value)',
+        ],
+        # bm25: menor é melhor; o texto pesa o dobro do nome do autor
+        'search': (
+            "SELECT rowid AS id, -bm25(coments_fts, 1.0, 0.5) AS score "
+            "FROM coments_fts WHERE coments_fts MATCH :terms"
+        ),
+    },
+}
+
+
+def _search_sql():
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in _SEARCH_INDEX_SQL:
+        raise ValueError(f"Banco '{dialect}' não suporta busca textual nesta aplicação.")
+    return dialect, _SEARCH_INDEX_SQL[dialect]
+
+
+def _run_index_statements(kind, review_id=None, user_id=None):
+    column, value = ('id', review_id) if review_id is not None else ('user_id', user_id)
+    for statement in _search_sql()[1][kind]:
+        db.session.execute(text(statement.format(column=column)), {'value': value})
+
+
+def sync_search_index(review_id=None, user_id=None):
+    """
+    (Re)indexa uma avaliação ou todas de um usuário (ex: trocou o nome).
+    NÃO faz commit. Chamar depois do flush (a linha precisa existir no banco).
+    """
+    _run_index_statements('sync', review_id, user_id)
+
+
+def remove_from_search_index(review_id=None, user_id=None):
+    """Tira do índice. NÃO faz commit. Chamar ANTES de apagar as avaliações."""
+    _run_index_statements('remove', review_id, user_id)
+
+
+def _search_terms(dialect, search_query):
+    """Só palavras (sem operadores do usuário), cada uma como prefixo."""
+    words = _SEARCH_TERM.findall(search_query.casefold())[:MAX_SEARCH_TERMS]
+    if dialect == 'postgresql':
+        return ' & '.join(f"{word}:*" for word in words)
+    return ' '.join(f'"{word}"*' for word in words)
 
-    raw_coments = query.all()
-    return [c.to_dict() for c in raw_coments]
 
-def search_coment(dados):
+def _encode_search_cursor(score, review_id):
+    return base64.urlsafe_b64encode(f"{score!r}|{review_id}".encode()).decode()
+
+
+def _decode_search_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        score, review_id = raw.split('|')
+        return float(score), int(review_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Cursor de paginação inválido.")
+
+
+def search_coment(dados, limit=DEFAULT_SEARCH_PAGE, cursor=None):
+    """
+    Busca no texto da avaliação e no nome do autor, mais relevantes primeiro.
+    Paginada por cursor (relevância, id).
+    Retorna ({"results": [...], "count": n, "next_cursor": str|None}, 200).
+    """
     search_query = dados.get('search', '')
+    dialect, sql = _search_sql()
+    terms = _search_terms(dialect, search_query)
 
-    if search_query:
-        # Busca filtrada: Joga nome do User e busca parcial (ilike)
-        raw_coments = Coments.query.join(User).filter(
-            User.name.ilike(f"%{search_query}%")
-        ).all()
-    else:
-        # Busca normal: Se não tem busca, retorna TUDO (conforme seu comentário sugeria)
-        # Se preferir dar erro, mantenha o seu return original
+    if not terms:
         return {"error": "Nenhum resultado encontrado"}, 400
 
-    # TRANSFORMAÇÃO DE DADOS (Essencial)
-    # Converte a lista de objetos do banco para lista de dicionários (JSON)
-    results = [c.to_dict() for c in raw_coments]
+    hits = text(sql['search']).bindparams(terms=terms) \
+        .columns(id=db.Integer, score=db.Float) \
+        .subquery('hits')
+
+    query = db.session.query(*REVIEW_COLUMNS, hits.c.score) \
+        .join(hits, hits.c.id == Coments.id) \
+        .outerjoin(User, User.id == Coments.user_id)
+
+    if cursor:
+        score, review_id = _decode_search_cursor(cursor)
+        query = query.filter(or_(
+            hits.c.score < score,
+            and_(hits.c.score == score, Coments.id < review_id)
+        ))
+
+    # Busca 1 a mais só para saber se existe próxima página
+    rows = query.order_by(hits.c.score.desc(), Coments.id.desc()).limit(limit + 1).all()
+
+    results = [_review_dict(row) for row in rows[:limit]]
+    next_cursor = _encode_search_cursor(rows[limit - 1].score, rows[limit - 1].id) if len(rows) > limit else None
 
     # Retorna 200 (Sucesso) e não 201
-    return {"results": results, "count": len(results)}, 200
+    return {"results": results, "count": len(results), "next_cursor": next_cursor}, 200
 
 
+def rebuild_search_index():
+    """Backfill: reindexa todas as avaliações. Retorna quantas foram indexadas."""
+    dialect, _ = _search_sql()
+    try:
+        if dialect == 'sqlite':
+            db.session.execute(text("DELETE FROM coments_fts"))
+            db.session.execute(text(
+                'INSERT INTO coments_fts (rowid, coment, author) '
+                'SELECT coments.id, coments.coment, "user".name FROM coments '
+                'LEFT JOIN "user" ON "user".id = coments.user_id'
+            ))
+        else:
+            db.session.execute(text(
+                'UPDATE coments SET search_vector = ' + _PG_DOCUMENT +
+                ' FROM "user" WHERE "user".id = coments.user_id'
+            ))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return db.session.query(func.count(Coments.id)).scalar()
 
 
-      
 def delete_self_coment(comment_id, user_id):
     """
     Remove um comentário específico, garantindo que pertença ao usuário.
     """
     # 1. Busca precisa pelo ID do comentário
-    comentario = Coments.query.filter_by(id=comment_id).first()
+    # FOR UPDATE: dois cliques em "apagar" não descontam a nota duas vezes
+    comentario = db.session.get(Coments, comment_id, with_for_update=True)
 
     # 2. Verifica se existe
     if not comentario:
@@ -120,8 +448,11 @@ def delete_self_coment(comment_id, user_id):
 
     # 4. Operação de Deleção
     try:
+        remove_from_search_index(review_id=comentario.id)
         db.session.delete(comentario)
+        _apply_rating_changes({comentario.stars: -1})
         db.session.commit()
+        invalidate_rating_stats()
         return {"msg": "Comentário removido com sucesso."}, 200
     except Exception as e:
         db.session.rollback()
@@ -133,8 +464,8 @@ def delete_coment(comment_id):
     """
     Remove um comentário específico, garantindo que pertença ao usuário.
     """
-    # 1. Busca precisa pelo ID do comentário usando filter_by
-    comentario = Coments.query.filter_by(id=comment_id).first()
+    # 1. Busca precisa pelo ID do comentário (travado, igual ao delete_self_coment)
+    comentario = db.session.get(Coments, comment_id, with_for_update=True)
 
     # 2. Verifica se existe
     if not comentario:
@@ -142,8 +473,11 @@ def delete_coment(comment_id):
 
     # 4. Operação de Deleção
     try:
+        remove_from_search_index(review_id=comentario.id)
         db.session.delete(comentario)
+        _apply_rating_changes({comentario.stars: -1})
         db.session.commit()
+        invalidate_rating_stats()
         return {"msg": "Comentário removido com sucesso."}, 200
     except Exception:
         db.session.rollback()
@@ -154,7 +488,8 @@ def update_coment(comment_id, user_id, novos_dados):
     """
     Atualiza um comentário existente (apenas texto e estrelas).
     """
-    comentario = Coments.query.filter_by(id=comment_id).first()
+    # FOR UPDATE: duas edições simultâneas não bagunçam o histograma
+    comentario = db.session.get(Coments, comment_id, with_for_update=True)
 
     if not comentario:
         return {"error": "Comentário não encontrado."}, 404
@@ -170,17 +505,28 @@ def update_coment(comment_id, user_id, novos_dados):
     if not novo_texto or not novas_stars:
         return {"error": "Texto e nota são obrigatórios."}, 400
 
+    # A nota vira coluna do histograma: só 1 a 5
+    try:
+        novas_stars = int(novas_stars)
+    except (TypeError, ValueError):
+        novas_stars = 0
+    if novas_stars not in VALID_STARS:
+        return {"error": "A avaliação deve ser entre 1 e 5 estrelas."}, 400
+
     # Filtro de Palavrões na Edição
-    palavras_no_texto = set(novo_texto.lower().split())
-    if BLOCKLIST.intersection(palavras_no_texto):
+    if moderation.contains(novo_texto):
         return {"error": "O texto editado contém palavras impróprias."}, 400
 
     try:
         # Sanitização e Update
+        _apply_rating_changes({comentario.stars: -1, novas_stars: 1} if comentario.stars != novas_stars else {})
         comentario.coment = bleach.clean(novo_texto, tags=[], strip=True)
-        comentario.stars = int(novas_stars)
+        comentario.stars = novas_stars
+        db.session.flush()
+        sync_search_index(review_id=comentario.id)
         
         db.session.commit()
+        invalidate_rating_stats()
         return {"msg": "Comentário atualizado!"}, 200
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,70 @@
+import json
+import hashlib
+from ..utils.cache import get_redis, LocalTTLCache
+
+# ==============================================================================
+# 🔁 IDEMPOTÊNCIA (Header Idempotency-Key)
+# ==============================================================================
+# Cliente no 4G ruim reenvia o mesmo POST. Guardamos a resposta da primeira
+# tentativa (Redis, ou memória local em Dev) e devolvemos a mesma coisa nas
+# repetições, sem rodar de novo a transação que trava produtos.
+
+IDEMPOTENCY_TTL = 60 * 60 * 24  # Resposta guardada por 24h
+PENDING_TTL = 30  # Se o worker morrer no meio, a chave libera sozinha
+MAX_KEY_LENGTH = 128
+
+_local_store = LocalTTLCache(maxsize=5000)
+
+
+def _storage_key(scope, user_id, key):
+    # Escopo por usuário: a chave de um cliente nunca colide com a de outro
+    return f"idem:{scope}:{user_id}:{key}"
+
+
+def fingerprint_request(raw_body):
+    return hashlib.sha256(raw_body or b'').hexdigest()
+
+
+def begin(scope, user_id, key, fingerprint):
+    """
+    Tenta reservar a chave para processar a requisição.
+    Retorna None se esta requisição deve ser processada agora,
+    ou o registro existente ({'state': 'pending'|'done', ...}).
+    """
+    storage_key = _storage_key(scope, user_id, key)
+    pending = {"state": "pending", "fingerprint": fingerprint}
+
+    redis = get_redis()
+    if redis:
+        if redis.set(storage_key, json.dumps(pending), nx=True, ex=PENDING_TTL):
+            return None
+        raw = redis.get(storage_key)
+        # Expirou entre o SET e o GET: processa normalmente
+        return json.loads(raw) if raw else begin(scope, user_id, key, fingerprint)
+
+    if _local_store.add(storage_key, pending, PENDING_TTL):
+        return None
+    return _local_store.get(storage_key)
+
+
+def complete(scope, user_id, key, fingerprint, status, body):
+    """Guarda a resposta final para ser repetida nas próximas tentativas."""
+    storage_key = _storage_key(scope, user_id, key)
+    record = {"state": "done", "fingerprint": fingerprint, "status": status, "body": body}
+
+    redis = get_redis()
+    if redis:
+        redis.set(storage_key, json.dumps(record, default=str), ex=IDEMPOTENCY_TTL)
+    else:
+        _local_store.set(storage_key, record, IDEMPOTENCY_TTL)
+
+
+def abort(scope, user_id, key):
+    """Falhou (ex: estoque): libera a chave para o cliente tentar de novo."""
+    storage_key = _storage_key(scope, user_id, key)
+
+    redis = get_redis()
+    if redis:
+        redis.delete(storage_key)
+    else:
+        _local_store.delete(storage_key)
@@ -0,0 +1,98 @@
+import json
+from flask import g, has_request_context
+from ..models import User, db
+from ..utils.cache import get_redis, LocalTTLCache
+
+# ==============================================================================
+# 🪪 IDENTIDADE EM CACHE (id, role, is_verified)
+# ==============================================================================
+# Os decorators de permissão só precisam saber se o usuário existe, qual o
+# papel dele e se está verificado. Em vez de um SELECT no User a cada
+# requisição protegida:
+#   1. flask.g   -> a mesma requisição nunca busca duas vezes
+#   2. Redis (ou memória local em Dev) com TTL curto -> entre requisições
+#   3. Banco     -> só no primeiro acesso / depois de invalidar
+# Quem muda papel, verificação ou apaga usuário chama invalidate_identity()
+# DEPOIS do commit. O TTL curto cobre o que não passar por aqui (ex: outro
+# processo sem Redis).
+IDENTITY_KEY = 'identity:{}'
+IDENTITY_TTL = 60  # Segundos
+
+_local_identities = LocalTTLCache(maxsize=5000)
+
+
+def _request_cache():
+    if not has_request_context():
+        return {}
+    if '_identities' not in g:
+        g._identities = {}
+    return g._identities
+
+
+def _load_from_db(user_id):
+    row = db.session.query(User.id, User.role, User.is_verified).filter(User.id == user_id).first()
+    if not row:
+        return None
+    return {"id": row.id, "role": row.role, "is_verified": bool(row.is_verified)}
+
+
+def get_identity(user_id):
+    """
+    Retorna {'id', 'role', 'is_verified'} do usuário, ou None se ele não
+    existir (ex: conta apagada com token ainda válido).
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    request_cache = _request_cache()
+    if user_id in request_cache:
+        return request_cache[user_id]
+
+    key = IDENTITY_KEY.format(user_id)
+    identity = None
+    redis = get_redis()
+    if redis:
+        try:
+            raw = redis.get(key)
+            identity = json.loads(raw) if raw else None
+        except Exception as e:
+            print(f"⚠️ Redis indisponível para o cache de identidade: {e}")
+            redis = None
+    else:
+        identity = _local_identities.get(key)
+
+    if identity is None:
+        identity = _load_from_db(user_id)
+        # Usuário inexistente não vai para o cache entre requisições
+        if identity is not None:
+            if redis:
+                try:
+                    redis.set(key, json.dumps(identity), ex=IDENTITY_TTL)
+                except Exception as e:
+                    print(f"⚠️ Erro ao salvar identidade no Redis: {e}")
+            else:
+                _local_identities.set(key, identity, IDENTITY_TTL)
+
+    request_cache[user_id] = identity
+    return identity
+
+
+def invalidate_identity(user_id):
+    """Chamar DEPOIS do commit que mudou role/is_verified ou apagou o usuário."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return
+
+    key = IDENTITY_KEY.format(user_id)
+    _request_cache().pop(user_id, None)
+    _local_identities.delete(key)
+
+    redis = get_redis()
+    if redis:
+        try:
+            redis.delete(key)
+        except Exception as e:
+            print(f"⚠️ Erro ao invalidar identidade {user_id}: {e}")
@@ -3,15 +3,20 @@ import json
 from ..schemas import orders_schema
 from sqlalchemy.orm import joinedload
 from datetime import datetime
-from sqlalchemy import desc
+from sqlalchemy import desc, insert, or_, and_
+import base64
+import csv
+import io
 from decimal import Decimal, InvalidOperation  # Importe InvalidOperation
 from ..extensions import socketio
+from ..utils.rooms import user_room
+from . import product_service, stock_service, report_service
 
 
 def create_order_logic(user_id, data):
     """
     Cria o pedido com:
-    1. Row Locking (previne erro de estoque concorrente).
+    1. Row Locking em lote (uma query, ordem fixa por ID: sem deadlock).
     2. Cálculo de preço via Backend (previne erro de float/fraude).
     """
     customer_data = data.get('customer', {})
@@ -21,9 +26,16 @@ def create_order_logic(user_id, data):
     if not items_data:
         raise ValueError("O carrinho está vazio.")
 
+    cart_lines = _parse_cart_lines(items_data)
+
+    redis_reserved = {}
+
     # Inicia a transação
     try:
-        # 1. Cria o objeto Order (ainda sem valor total)
+        # 1. Trava TODOS os produtos de uma vez e baixa o estoque
+        products, stock_changed, redis_reserved = _reserve_stock(cart_lines)
+
+        # 2. Cria o objeto Order (ainda sem valor total)
         new_order = Order(
             user_id=user_id,
             customer_name=customer_data.get('name'),
@@ -38,103 +50,414 @@ def create_order_logic(user_id, data):
             delivery_fee=0.00 # Implementar lógica de taxa se houver
         )
         
-        db.session.add(new_order)
-        db.session.flush() # Gera o ID do pedido para usar nos itens
-
         calculated_total = Decimal('0.00')
+        order_items = []
 
-        # 2. Itera sobre os itens
-        for item in items_data:
-            prod_id = item.get('product_id')
-            qtd = item.get('quantity', 1)
-            
-            # 🔥 CORREÇÃO DE CONCORRÊNCIA (Ponto 3): 
-            # .with_for_update() trava este produto até o fim da transação.
-            # Se outro cliente tentar comprar, ele espera essa transação acabar.
-            product = Product.query.filter_by(id=prod_id).with_for_update().first()
-            
-            if not product:
-                raise ValueError(f"Produto ID {prod_id} não encontrado.")
-                
-            if not product.is_available or product.is_deleted:
-                raise ValueError(f"O produto '{product.name}' não está mais disponível.")
-
-            # Verifica Estoque (se aplicável)
-            if product.stock_quantity is not None:
-                if product.stock_quantity < qtd:
-                    raise ValueError(f"Estoque insuficiente para '{product.name}'. Restam: {product.stock_quantity}")
-                product.stock_quantity -= qtd
+        # 3. Monta os itens (produtos já travados e estoque já baixado)
+        for prod_id, qtd, customizations in cart_lines:
+            product = products[prod_id]
 
             # 🔥 CORREÇÃO DE PREÇO (Ponto 2):
-            # Usamos product.price (do banco), ignoramos o preço do JSON do frontend.
-            price_at_moment = product.price
+            # Preço do banco + opcionais escolhidos (tabela do produto), ignoramos
+            # o preço do JSON do frontend. É o mesmo valor que o carrinho mostra.
+            price_at_moment = _calculate_item_price(product, customizations)
             item_total = price_at_moment * qtd
             calculated_total += item_total
 
-            # Cria o item do pedido
-            order_item = OrderItem(
-                order_id=new_order.id,
-                product_id=product.id,
-                quantity=qtd,
-                price_at_time=price_at_moment, # Salva o preço histórico
-                customizations_json=str(item.get('customizations', {}))
-            )
-            db.session.add(order_item)
+            order_items.append({
+                "product_id": product.id,
+                "quantity": qtd,
+                "price_at_time": price_at_moment, # Salva o preço histórico
+                "customizations_json": json.dumps(customizations)  # JSON de verdade: o admin.js faz JSON.parse
+            })
 
         # Atualiza o total do pedido com a soma confiável do backend
         new_order.total_price = calculated_total
-        
+
+        # ⚡ PERSISTÊNCIA EM LOTE:
+        # Um único flush grava o pedido (já com o total) e devolve o ID.
+        # Os itens vão TODOS num único INSERT em lote (executemany, sem
+        # RETURNING), em vez de um session.add() + INSERT por linha.
+        db.session.add(new_order)
+        db.session.flush()
+        order_id = new_order.id
+        order_total = str(new_order.total_price)
+
+        for row in order_items:
+            row["order_id"] = order_id
+        db.session.execute(insert(OrderItem), order_items)
+
         db.session.commit()
+
+        # O cardápio exibe o estoque: invalida o cache se algum item controlado mudou
+        if stock_changed:
+            product_service.bump_menu_version()
         
         return {
             "sucesso": True,
-            "id": new_order.id,
-            "total": str(new_order.total_price),
-            "redirect_url": f"/pedido_confirmado.html?id={new_order.id}"
+            "id": order_id,
+            "total": order_total,
+            "redirect_url": f"/pedido_confirmado.html?id={order_id}"
         }
 
     except Exception as e:
         db.session.rollback() # Desfaz tudo se der erro no estoque ou código
+        if redis_reserved:
+            stock_service.release_stock(redis_reserved)  # Devolve o que foi reservado no Redis
         raise e
 
 
-def get_order_logic(user_id):
-    orders = Order.query.options(joinedload(Order.items)) \
-        .filter_by(user_id=user_id) \
-        .order_by(Order.date_created.desc()) \
+def _parse_cart_lines(items_data):
+    """Normaliza o carrinho em [(product_id, quantidade, customizações)]."""
+    cart_lines = []
+    for item in items_data:
+        try:
+            prod_id = int(item.get('product_id'))
+            qtd = int(item.get('quantity', 1))
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError("Item do carrinho inválido.")
+
+        if qtd < 1:
+            raise ValueError("Quantidade inválida no carrinho.")
+
+        customizations = item.get('customizations') or {}
+        if not isinstance(customizations, dict):
+            raise ValueError("Personalização do item inválida.")
+
+        cart_lines.append((prod_id, qtd, customizations))
+    return cart_lines
+
+
+def _reserve_stock(cart_lines):
+    """
+    Reserva o estoque do carrinho inteiro numa única ida ao banco.
+
+    🔥 CONCORRÊNCIA: Um único SELECT ... FOR UPDATE com ORDER BY id.
+    Como todas as transações travam as linhas na mesma ordem, dois carrinhos
+    com os mesmos produtos em ordem diferente não geram deadlock.
+    Com o motor Redis ligado (stock_service), não há FOR UPDATE: o saldo é
+    baixado atomicamente no Redis e gravado no banco depois.
+    Todos os problemas (produto sumiu, pausado, sem estoque) são
+    reportados juntos. Retorna ({id: Product}, estoque_mudou, reservado_no_redis).
+    """
+    wanted = {}
+    for prod_id, qtd, _ in cart_lines:
+        wanted[prod_id] = wanted.get(prod_id, 0) + qtd
+
+    use_engine = stock_service.is_enabled()
+
+    query = Product.query.filter(Product.id.in_(wanted.keys())).order_by(Product.id)
+    if not use_engine:
+        query = query.with_for_update()
+    products = {p.id: p for p in query.all()}
+
+    problems = []
+    for prod_id in sorted(wanted):
+        product = products.get(prod_id)
+        qtd = wanted[prod_id]
+
+        if not product:
+            problems.append(f"Produto ID {prod_id} não encontrado.")
+        elif not product.is_available or product.is_deleted:
+            problems.append(f"O produto '{product.name}' não está mais disponível.")
+        elif not use_engine and product.stock_quantity is not None and product.stock_quantity < qtd:
+            problems.append(f"Estoque insuficiente para '{product.name}'. Restam: {product.stock_quantity}.")
+
+    if problems:
+        raise ValueError(" ".join(problems))
+
+    tracked = {pid: qtd for pid, qtd in wanted.items() if products[pid].stock_quantity is not None}
+
+    if use_engine:
+        return products, False, stock_service.reserve_stock(tracked, products)
+
+    for prod_id, qtd in tracked.items():
+        products[prod_id].stock_quantity -= qtd
+        products[prod_id].stock_version = Product.stock_version + 1  # Chave antiga no Redis fica velha
+
+    return products, bool(tracked), {}
+
+
+# ==============================================================================
+# 🍳 PROJEÇÃO DA COZINHA (Listagens de pedidos)
+# ==============================================================================
+# O OrderSchema aninha o ProductSchema inteiro (descrição, details_json, foto)
+# em CADA item. Para listagens, usamos uma projeção enxuta montada direto de
+# UMA query só de colunas (sem objetos ORM, sem Marshmallow).
+KITCHEN_ORDER_COLUMNS = (
+    Order.id, Order.date_created, Order.status, Order.total_price, Order.delivery_fee,
+    Order.customer_name, Order.customer_phone, Order.street, Order.number,
+    Order.neighborhood, Order.complement, Order.user_id,
+    Order.payment_method, Order.payment_status,
+)
+
+
+def _kitchen_projection(order_ids_query):
+    """
+    Recebe uma query de Order.id (já filtrada/ordenada/limitada) e devolve
+    a lista de pedidos enxutos na mesma ordem:
+    {...campos do pedido, items: [{id, product_id, product: {name}, quantity,
+    price_at_time, customizations_json}]}
+    """
+    page = order_ids_query.subquery()
+
+    rows = db.session.query(
+        *KITCHEN_ORDER_COLUMNS,
+        OrderItem.id.label('item_id'),
+        OrderItem.product_id,
+        Product.name.label('product_name'),
+        OrderItem.quantity,
+        OrderItem.price_at_time,
+        OrderItem.customizations_json,
+    ).select_from(Order) \
+        .join(page, page.c.id == Order.id) \
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id) \
+        .outerjoin(Product, Product.id == OrderItem.product_id) \
+        .order_by(desc(Order.date_created), desc(Order.id), OrderItem.id) \
         .all()
-    return orders_schema.dump(orders)
 
+    orders = {}
+    for row in rows:
+        order = orders.get(row.id)
+        if order is None:
+            order = {col.key: getattr(row, col.key) for col in KITCHEN_ORDER_COLUMNS}
+            if order['date_created']:
+                order['date_created'] = order['date_created'].isoformat()
+            order['items'] = []
+            orders[row.id] = order
+
+        if row.item_id is not None:
+            order['items'].append({
+                "id": row.item_id,
+                "product_id": row.product_id,
+                "product": {"name": row.product_name},
+                "quantity": row.quantity,
+                "price_at_time": row.price_at_time,
+                "customizations_json": row.customizations_json,
+            })
+
+    return list(orders.values())
+
+
+def get_order_logic(user_id):
+    order_ids = db.session.query(Order.id).filter(Order.user_id == user_id)
+    return _kitchen_projection(order_ids)
+
+
+OPEN_STATUSES = ["Recebido", "Em Preparo", "Saiu para Entrega"]
+DEFAULT_ORDERS_PAGE = 100
+MAX_ORDERS_PAGE = 500
+
+
+def encode_order_cursor(order):
+    """Cursor opaco com a posição (date_created, id) do último pedido da página."""
+    raw = f"{order['date_created']}|{order['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_order_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, order_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(date_str), int(order_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Cursor de paginação inválido.")
 
-def get_filtered_orders(filters):
-    query = Order.query.options(joinedload(Order.items))
+
+def parse_page_limit(raw_limit, default=DEFAULT_ORDERS_PAGE, maximum=MAX_ORDERS_PAGE):
+    if raw_limit in (None, ''):
+        return default
+    try:
+        limit = int(raw_limit)
+    except (TypeError, ValueError):
+        raise ValueError("Parâmetro 'limit' inválido.")
+    return max(1, min(limit, maximum))
+
+
+def get_filtered_orders(filters, limit=DEFAULT_ORDERS_PAGE, cursor=None):
+    """
+    Lista pedidos (mais novos primeiro) com paginação por cursor (keyset).
+    Sem nenhum filtro, a visão padrão é "hoje + pedidos em aberto",
+    em vez do histórico inteiro do restaurante.
+    Retorna {"orders": [...], "next_cursor": str|None}.
+    """
+    query = db.session.query(Order.id)
 
     if filters.get('order_id') and filters['order_id'] != '':
         query = query.filter(Order.id == filters['order_id'])
+    elif not any(filters.get(k) for k in ('start_date', 'end_date', 'customer_name', 'payment_method')):
+        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        query = query.filter(or_(Order.status.in_(OPEN_STATUSES), Order.date_created >= today_start))
     else:
-        if filters.get('start_date'):
-            try:
-                start = datetime.strptime(filters['start_date'], '%Y-%m-%d')
-                query = query.filter(Order.date_created >= start)
-            except:
-                pass
+        query = _apply_order_filters(query, filters)
+
+    # Keyset: continua exatamente depois do último pedido da página anterior
+    if cursor:
+        cursor_date, cursor_id = decode_order_cursor(cursor)
+        query = query.filter(or_(
+            Order.date_created < cursor_date,
+            and_(Order.date_created == cursor_date, Order.id < cursor_id)
+        ))
+
+    # Busca 1 a mais só para saber se existe próxima página
+    query = query.order_by(desc(Order.date_created), desc(Order.id)).limit(limit + 1)
+    orders = _kitchen_projection(query)
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_order_cursor(orders[-1])
+
+    return {"orders": orders, "next_cursor": next_cursor}
+
+
+def _apply_order_filters(query, filters):
+    """Filtros de data (YYYY-MM-DD), nome do cliente e forma de pagamento."""
+    if filters.get('start_date'):
+        try:
+            start = datetime.strptime(filters['start_date'], '%Y-%m-%d')
+            query = query.filter(Order.date_created >= start)
+        except:
+            pass
+
+    if filters.get('end_date'):
+        try:
+            end = datetime.strptime(filters['end_date'], '%Y-%m-%d')
+            end = end.replace(hour=23, minute=59, second=59)
+            query = query.filter(Order.date_created <= end)
+        except:
+            pass
+
+    if filters.get('customer_name'):
+        query = query.filter(Order.customer_name.ilike(f"%{filters['customer_name']}%"))
+
+    if filters.get('payment_method'):
+        query = query.filter(Order.payment_method == filters['payment_method'])
+
+    return query
+
+
+# ==============================================================================
+# 📤 EXPORTAÇÃO (CSV / NDJSON em streaming)
+# ==============================================================================
+# Uma linha por ITEM (com os dados do pedido repetidos), lida do banco em lotes
+# por cursor no servidor (yield_per) e enviada ao navegador conforme sai.
+# A memória fica constante: um mês ou um ano de pedidos custam o mesmo.
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    Order.id.label('order_id'),
+    Order.date_created,
+    Order.status,
+    Order.customer_name,
+    Order.customer_phone,
+    Order.street,
+    Order.number,
+    Order.neighborhood,
+    Order.complement,
+    Order.payment_method,
+    Order.payment_status,
+    Order.total_price.label('order_total'),
+    Order.delivery_fee,
+    OrderItem.id.label('item_id'),
+    OrderItem.product_id,
+    Product.name.label('product_name'),
+    OrderItem.quantity,
+    OrderItem.price_at_time,
+    OrderItem.customizations_json,
+)
+EXPORT_FIELDS = [col.key for col in EXPORT_COLUMNS] + ['item_total']
+
+
+def _export_rows(query):
+    """Gera dicts planos (valores já em texto/números simples), lote a lote."""
+    for row in query:
+        line = row._asdict()
+        line['date_created'] = line['date_created'].isoformat() if line['date_created'] else None
+        if line['quantity'] is not None and line['price_at_time'] is not None:
+            line['item_total'] = line['price_at_time'] * line['quantity']
+        else:
+            line['item_total'] = None
+        for key, value in line.items():
+            if isinstance(value, Decimal):
+                line[key] = str(value)
+        yield line
+
+
+def _drain(buffer):
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def _stream_csv(query):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    buffer.write('\ufeff')  # BOM: o Excel abre os acentos certinho
+    writer.writeheader()
+    yield _drain(buffer)  # Primeiros bytes saem antes de consultar o banco
+
+    for i, line in enumerate(_export_rows(query), start=1):
+        writer.writerow(line)
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield _drain(buffer)
+
+    tail = _drain(buffer)
+    if tail:
+        yield tail
+
+
+def _stream_ndjson(query):
+    yield ''  # Abre a resposta (cabeçalhos HTTP) antes de consultar o banco
+    lines = []
+    for line in _export_rows(query):
+        lines.append(json.dumps(line, ensure_ascii=False))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_orders(filters, export_format):
+    """
+    Valida os filtros e devolve um GERADOR de pedaços de texto (csv | ndjson).
+    start_date e end_date (YYYY-MM-DD) são obrigatórios; status é opcional.
+    Levanta ValueError na hora (antes do streaming começar) se algo for inválido.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError("Formato inválido. Use 'csv' ou 'ndjson'.")
+
+    if not filters.get('start_date') or not filters.get('end_date'):
+        raise ValueError("Informe start_date e end_date (YYYY-MM-DD).")
+    try:
+        start = datetime.strptime(filters['start_date'], '%Y-%m-%d')
+        end = datetime.strptime(filters['end_date'], '%Y-%m-%d')
+    except ValueError:
+        raise ValueError("Formato de data inválido. Use YYYY-MM-DD.")
+    if end < start:
+        raise ValueError("end_date não pode ser antes de start_date.")
 
-        if filters.get('end_date'):
-            try:
-                end = datetime.strptime(filters['end_date'], '%Y-%m-%d')
-                end = end.replace(hour=23, minute=59, second=59)
-                query = query.filter(Order.date_created <= end)
-            except:
-                pass
+    query = db.session.query(*EXPORT_COLUMNS).select_from(Order) \
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id) \
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+    query = _apply_order_filters(query, filters)
 
-        if filters.get('customer_name'):
-            query = query.filter(Order.customer_name.ilike(f"%{filters['customer_name']}%"))
+    if filters.get('status'):
+        query = query.filter(Order.status == filters['status'])
 
-        if filters.get('payment_method'):
-            query = query.filter(Order.payment_method == filters['payment_method'])
+    # Ordem cronológica (como o contador lê) e cursor no servidor
+    query = query.order_by(Order.date_created, Order.id, OrderItem.id) \
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
 
-    orders = query.order_by(desc(Order.date_created)).all()
-    return orders_schema.dump(orders)
+    if export_format == 'csv':
+        return _stream_csv(query)
+    return _stream_ndjson(query)
 
 
 # --- FUNÇÕES AUXILIARES BLINDADAS ---
@@ -143,6 +466,7 @@ def _calculate_item_price(product, customizations):
     """
     Calcula o preço do item garantindo que tudo seja DECIMAL.
     Evita erro de Float + Decimal.
+    Usa a tabela compilada do produto: O(escolhas), sem json.loads por item.
     """
     # 1. Preço Base (Converte Float do banco para Decimal)
     try:
@@ -150,23 +474,19 @@ def _calculate_item_price(product, customizations):
     except:
         base_price = Decimal('0.00')
 
-    details = product.get_details()
-
-    # 2. Soma Adicionais
-    for tipo in ['adicionais', 'acompanhamentos', 'bebidas']:
-        escolhidos = customizations.get(tipo, [])
-        disponiveis = details.get(tipo, [])
+    options = product_service.get_product_options_table(product)
 
-        for esc in escolhidos:
-            match = next((Op for Op in disponiveis if Op['nome'] == esc), None)
-            if match:
-                try:
-                    # Converte preço do adicional para Decimal
-                    preco_adicional = Decimal(str(match['price']))
-                    base_price += preco_adicional
-                except (ValueError, TypeError, InvalidOperation):
-                    print(f"Erro ao converter preço do adicional: {esc}")
-                    continue
+    # 2. Soma Carne + Adicionais (nome desconhecido não soma nada)
+    for tipo in product_service.CHARGED_OPTION_TYPES:
+        escolhas = customizations.get(tipo) or []
+        if not isinstance(escolhas, list):
+            continue
+        for esc in escolhas:
+            if not isinstance(esc, str):
+                continue
+            preco_adicional = options.get((tipo, esc))
+            if preco_adicional is not None:
+                base_price += preco_adicional
 
     return base_price
 
@@ -175,22 +495,28 @@ def update_order_status_logic(order_id, new_status):
     ALLOWED = ["Recebido", "Em Preparo", "Saiu para Entrega", "Concluído", "Cancelado"]
     if new_status not in ALLOWED: raise ValueError("Status inválido")
 
-    order = Order.query.get(order_id)
+    # FOR UPDATE: duas mudanças simultâneas no mesmo pedido não somam duas vezes no rollup
+    order = db.session.get(Order, order_id, with_for_update=True)
     if not order: raise ValueError("Pedido não encontrado")
 
+    changed_day = report_service.track_status_change(order, order.status, new_status)
     order.status = new_status
     db.session.commit()
+    if changed_day:
+        report_service.invalidate_reports(changed_day)
 
-    order_data = orders_schema.dump([order])[0]
+    order_data = _kitchen_projection(db.session.query(Order.id).filter(Order.id == order.id))[0]
 
     print(f"📡 Status do Pedido #{order.id} mudou para {new_status}")
     payload = {
         'order_id': order.id,
         'status': new_status,
-        'user_id': order.user_id,
+        'user_id': order_data['user_id'],
         'order_data': order_data
     }
-    socketio.emit('status_update', convert_decimals(payload))
+    # Só o dono do pedido recebe: o payload tem endereço e telefone
+    if order_data['user_id']:
+        socketio.emit('status_update', convert_decimals(payload), to=user_room(order_data['user_id']))
 
     return order_data
 
@@ -210,25 +536,44 @@ def cancel_order_by_client_logic(order_id, user_id):
     if str(order.user_id) != str(user_id): raise ValueError("Não autorizado")
     if order.status != 'Recebido': raise ValueError("Já em preparo")
 
+    use_engine = stock_service.is_enabled()
+    stock_changed = False
+    to_release = {}
     for item in order.items:
         if item.product.stock_quantity is not None:
-            item.product.stock_quantity += item.quantity
+            if use_engine:
+                to_release[item.product_id] = to_release.get(item.product_id, 0) + item.quantity
+            else:
+                item.product.stock_quantity += item.quantity
+                item.product.stock_version = Product.stock_version + 1
+                stock_changed = True
 
     order.status = 'Cancelado'
     db.session.commit()
+
+    # Com o motor Redis, o write-back é quem atualiza o banco (e o cardápio)
+    if to_release:
+        stock_service.release_stock(to_release)
+    if stock_changed:
+        product_service.bump_menu_version()
     return order
 
 
 def soft_delete_order_by_admin_logic(order_id):
-    order = Order.query.get(order_id)
+    order = db.session.get(Order, order_id, with_for_update=True)
     if not order: raise ValueError("Pedido não encontrado")
+    changed_day = report_service.track_status_change(order, order.status, 'Cancelado')
     order.status = 'Cancelado'
     db.session.commit()
+    if changed_day:
+        report_service.invalidate_reports(changed_day)
     return order
 
 
-def get_all_orders_daily():
-    return get_filtered_orders({})
+def get_all_orders_daily(limit=DEFAULT_ORDERS_PAGE, cursor=None):
+    """Pedidos do dia (UTC), igual ao que fica gravado em date_created."""
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+    return get_filtered_orders({'start_date': today, 'end_date': today}, limit, cursor)
 
 
 def convert_decimals(obj):
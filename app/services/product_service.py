@@ -1,9 +1,222 @@
 from ..models import Product, db
 from ..schemas import products_schema, product_schema
 import json
+import gzip
+from flask import current_app
 from marshmallow import ValidationError
 import os
+import secrets
+from decimal import Decimal, InvalidOperation
 from ..extensions import socketio
+from ..utils.cache import get_redis, LocalTTLCache
+from . import stock_service
+
+# ==============================================================================
+# ⚡ CACHE DO CARDÁPIO (Versionado + Snapshots pré-serializados)
+# ==============================================================================
+# O cardápio só muda quando o admin edita. Cada edição incrementa a versão e
+# dispara a reconstrução dos snapshots em segundo plano: o cardápio público, o
+# do admin e cada categoria são renderizados UMA vez em bytes JSON (+ gzip).
+# As rotas servem esses bytes direto, sem Postgres e sem Marshmallow.
+#
+# A versão é "<época>.<contador>". O contador recomeça do zero quando o Redis
+# é limpo (ou, sem Redis, quando o processo reinicia); a época muda junto, então
+# um ETag antigo ("menu-<versão>-<variante>") nunca casa com conteúdo novo.
+MENU_VERSION_KEY = 'menu:version'
+MENU_EPOCH_KEY = 'menu:epoch'
+MENU_CACHE_TTL = 60 * 60 * 12  # Segundos (versões antigas expiram sozinhas)
+
+MENU_PUBLIC = 'public'
+MENU_ADMIN = 'admin'
+
+_EMPTY_SNAPSHOT = (b'[]', gzip.compress(b'[]'))
+
+_BOOT_EPOCH = secrets.token_hex(4)  # Época do contador local (muda a cada boot)
+_local_menu_version = 0
+_menu_built_version = None
+_menu_snapshots = {}  # {variante: (versao, json_bytes, gzip_bytes)}
+
+
+def menu_category_variant(category_name):
+    return f"category:{category_name}"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def get_menu_version():
+    """Versão atual do cardápio (Redis se disponível, senão contador local)."""
+    redis = get_redis()
+    if redis:
+        try:
+            counter, epoch = redis.mget(MENU_VERSION_KEY, MENU_EPOCH_KEY)
+            if epoch is None:
+                # Redis novo/limpo: o primeiro processo que chegar define a época
+                redis.set(MENU_EPOCH_KEY, secrets.token_hex(4), nx=True)
+                counter, epoch = redis.mget(MENU_VERSION_KEY, MENU_EPOCH_KEY)
+            return f"{_decode(epoch)}.{int(counter or 0)}"
+        except Exception as e:
+            print(f"⚠️ Redis indisponível para versão do cardápio: {e}")
+    return f"{_BOOT_EPOCH}.{_local_menu_version}"
+
+
+def bump_menu_version():
+    """Invalida o cache do cardápio. Chamar sempre DEPOIS do commit."""
+    global _local_menu_version
+    _local_menu_version += 1
+
+    redis = get_redis()
+    if redis:
+        try:
+            redis.incr(MENU_VERSION_KEY)
+        except Exception as e:
+            print(f"⚠️ Erro ao incrementar versão do cardápio: {e}")
+
+    _schedule_snapshot_rebuild()
+
+
+def get_menu_etag(variant, version=None):
+    if version is None:
+        version = get_menu_version()
+    return f"menu-{version}-{variant}"
+
+
+def build_menu_snapshots(version=None):
+    """
+    Renderiza todas as variantes do cardápio com UMA query e UM dump.
+    Salva na memória local e no Redis (hash 'menu:<versao>').
+    """
+    global _menu_built_version
+    if version is None:
+        version = get_menu_version()
+
+    products = Product.query.order_by(Product.id).all()
+    dumped = products_schema.dump(products)
+
+    variants = {MENU_ADMIN: dumped, MENU_PUBLIC: []}
+    for p in dumped:
+        if p.get('is_available'):
+            variants[MENU_PUBLIC].append(p)
+            variants.setdefault(menu_category_variant(p.get('category')), []).append(p)
+
+    packed = {}
+    for variant, payload in variants.items():
+        raw = current_app.json.dumps(payload).encode('utf-8')
+        packed[variant] = (raw, gzip.compress(raw))
+
+    for variant, (raw, gz) in packed.items():
+        _menu_snapshots[variant] = (version, raw, gz)
+    _menu_built_version = version
+
+    redis = get_redis()
+    if redis:
+        try:
+            key = f"menu:{version}"
+            pipe = redis.pipeline()
+            pipe.hset(key, mapping={v: gz for v, (_, gz) in packed.items()})
+            pipe.hset(key, '__built__', 1)
+            pipe.expire(key, MENU_CACHE_TTL)
+            pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar cardápio no Redis: {e}")
+
+    return packed
+
+
+def get_menu_snapshot(variant, version=None):
+    """
+    Retorna (json_bytes, gzip_bytes) da variante pedida.
+    Ordem: memória local -> Redis -> banco (reconstrói tudo).
+    Variante sem produtos (ex: categoria vazia) vira '[]'.
+    """
+    if version is None:
+        version = get_menu_version()
+
+    cached = _menu_snapshots.get(variant)
+    if cached and cached[0] == version:
+        return cached[1], cached[2]
+    if _menu_built_version == version:
+        return _EMPTY_SNAPSHOT
+
+    redis = get_redis()
+    if redis:
+        try:
+            gz, built = redis.hmget(f"menu:{version}", variant, '__built__')
+            if built:
+                if gz is None:
+                    return _EMPTY_SNAPSHOT
+                _menu_snapshots[variant] = (version, gzip.decompress(gz), gz)
+                return _menu_snapshots[variant][1], gz
+        except Exception as e:
+            print(f"⚠️ Erro ao ler cardápio do Redis: {e}")
+
+    packed = build_menu_snapshots(version)
+    return packed.get(variant, _EMPTY_SNAPSHOT)
+
+
+def _schedule_snapshot_rebuild():
+    """Reconstrói os snapshots fora da requisição (greenlet/thread do SocketIO)."""
+    app = current_app._get_current_object()
+
+    def _rebuild():
+        with app.app_context():
+            try:
+                build_menu_snapshots()
+            except Exception as e:
+                print(f"⚠️ Erro ao reconstruir cardápio: {e}")
+
+    socketio.start_background_task(_rebuild)
+
+
+# ==============================================================================
+# 🧾 TABELA DE PREÇOS DOS OPCIONAIS (Compilada)
+# ==============================================================================
+# Em vez de rodar json.loads(details_json) e varrer listas a cada item do
+# carrinho, compilamos uma vez: {(tipo, nome): Decimal(preco)}.
+# O próprio details_json funciona como versão: se mudar, recompila.
+PRICED_OPTION_TYPES = ('adicionais', 'acompanhamentos', 'bebidas')  # Opcionais (relatórios)
+# A carne é escolha obrigatória, não opcional, mas o acréscimo dela também é cobrado
+CHARGED_OPTION_TYPES = ('carnes',) + PRICED_OPTION_TYPES
+
+# LRU limitado: produtos apagados/antigos não ficam para sempre na memória
+_options_table_cache = LocalTTLCache(maxsize=2000)  # {product_id: (details_json, tabela)}
+
+
+def _compile_options_table(details_json):
+    try:
+        details = json.loads(details_json or '{}')
+    except (ValueError, TypeError):
+        details = {}
+
+    table = {}
+    for tipo in CHARGED_OPTION_TYPES:
+        for op in details.get(tipo) or []:
+            if not isinstance(op, dict) or 'nome' not in op:
+                continue
+            key = (tipo, op['nome'])
+            if key in table:
+                continue  # Nome repetido: vale o primeiro (mesmo critério do next())
+            try:
+                table[key] = Decimal(str(op['price']))
+            except (KeyError, ValueError, TypeError, InvalidOperation):
+                print(f"Erro ao converter preço do adicional: {op.get('nome')}")
+    return table
+
+
+def get_product_options_table(product):
+    """Tabela {(tipo, nome): Decimal} do produto, compilada sob demanda."""
+    cached = _options_table_cache.get(product.id)
+    if cached and cached[0] == product.details_json:
+        return cached[1]
+
+    table = _compile_options_table(product.details_json)
+    _options_table_cache.set(product.id, (product.details_json, table))
+    return table
+
+
+def invalidate_product_options(product_id):
+    _options_table_cache.delete(product_id)
 
 
 def get_all_products(only_available=True):
@@ -43,6 +256,7 @@ def create_product(data):
 
         db.session.add(new_product)
         db.session.commit()
+        bump_menu_version()
 
         return product_schema.dump(new_product)
     except ValidationError as err:
@@ -61,11 +275,19 @@ def update_product(product_id, data):
 
     # Atualiza campos simples (name, price, description, etc)
     for key, value in data.items():
-        if hasattr(product, key):
+        if hasattr(product, key) and key != 'stock_version':
             setattr(product, key, value)
 
+    # Nova versão: um write-back do Redis com o saldo antigo não sobrescreve este valor
+    if 'stock_quantity' in data:
+        product.stock_version = Product.stock_version + 1
+
     try:
         db.session.commit()
+        invalidate_product_options(product.id)
+        if 'stock_quantity' in data and stock_service.is_enabled():
+            stock_service.reset_product_stock(product.id, product.stock_quantity, product.stock_version)
+        bump_menu_version()
         return product_schema.dump(product)
     except Exception as e:
         db.session.rollback()
@@ -83,6 +305,7 @@ def toggle_availability(product_id):
 
     product.is_available = not product.is_available
     db.session.commit()
+    bump_menu_version()
 
     # [NOVO] Avisa que o produto mudou
     print(f"📡 Produto {product.id} agora está {'Disponível' if product.is_available else 'Indisponível'}")
@@ -128,4 +351,6 @@ def delete_product(product_id, password_attempt):
     # Se passou por tudo, apaga.
     db.session.delete(product)
     db.session.commit()
+    invalidate_product_options(product_id)
+    bump_menu_version()
     return True
\ No newline at end of file
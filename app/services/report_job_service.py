@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import uuid
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from ..models import db
+from ..utils.cache import get_redis
+from . import report_service
+
+try:
+    from gevent import monkey
+    from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+except ImportError:
+    monkey = None  # Sem gevent o ThreadPoolExecutor comum já usa threads do SO
+
+# ==============================================================================
+# ⏳ RELATÓRIOS EM SEGUNDO PLANO (Jobs)
+# ==============================================================================
+# Um relatório de um ano inteiro não pode segurar o worker que atende checkout.
+# A rota só enfileira e responde 202; a conta roda num pool LIMITADO
+# (REPORT_JOB_WORKERS) e o resultado fica no Redis (ou em disco, sem Redis)
+# para o admin buscar depois com o job_id.
+#
+# Chave: report:job:<id> -> JSON {id, report, status, params, result|error, ...}
+# Status: queued -> running -> done | error
+#
+# Threads de VERDADE: em produção o run.py faz gevent.monkey.patch_all(), e aí
+# o ThreadPoolExecutor comum vira greenlets no MESMO hub das requisições. Como
+# o psycopg2 bloqueia dentro do C (não temos psycogreen), cada query pesada do
+# relatório congelaria checkout e cardápio. Com o threading patchado usamos o
+# gevent.threadpool.ThreadPoolExecutor, que sempre roda em threads do SO: a
+# query trava só a thread do job (e solta o GIL enquanto espera o Postgres).
+JOB_KEY = 'report:job:{}'
+JOB_TTL = 60 * 60  # Resultado fica disponível por 1h
+
+_executor = None
+# Lock do SO (não o do gevent): é usado pelas greenlets E pelas threads do pool
+_executor_lock = monkey.get_original('threading', 'Lock')() if monkey else threading.Lock()
+_inflight = 0  # Jobs na fila + rodando (deste processo)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = current_app.config.get('REPORT_JOB_WORKERS', 2)
+            if monkey and monkey.is_module_patched('threading'):
+                _executor = NativeThreadPoolExecutor(max_workers=workers)
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-job')
+    return _executor
+
+
+def _jobs_dir():
+    path = current_app.config.get('REPORT_JOBS_DIR') or os.path.join(tempfile.gettempdir(), 'report_jobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _save_job(job):
+    raw = json.dumps(job)
+    redis = get_redis()
+    if redis:
+        redis.set(JOB_KEY.format(job['id']), raw, ex=JOB_TTL)
+        return
+
+    # Escrita atômica: quem consulta nunca lê um arquivo pela metade
+    path = os.path.join(_jobs_dir(), f"{job['id']}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(raw)
+    os.replace(tmp_path, path)
+
+
+def get_job(job_id):
+    """Retorna o job (dict) ou None se não existir / já expirou."""
+    try:
+        uuid.UUID(job_id)  # Também impede path traversal no modo disco
+    except ValueError:
+        return None
+
+    redis = get_redis()
+    if redis:
+        raw = redis.get(JOB_KEY.format(job_id))
+        return json.loads(raw) if raw else None
+
+    path = os.path.join(_jobs_dir(), f"{job_id}.json")
+    try:
+        if time.time() - os.path.getmtime(path) > JOB_TTL:
+            os.remove(path)
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def submit_job(report, start_day, end_day, filters=None, requested_by=None):
+    """
+    Enfileira o relatório e retorna o job (status 'queued').
+    Retorna None se a fila estiver cheia (REPORT_JOB_MAX_QUEUE).
+    Levanta ValueError se o relatório não existir.
+    """
+    global _inflight
+    if report not in report_service.REPORT_FILTERS:
+        raise ValueError(f"Relatório desconhecido: {report}")
+
+    filters = {key: (filters or {}).get(key) for key in report_service.REPORT_FILTERS[report]}
+
+    with _executor_lock:
+        if _inflight >= current_app.config.get('REPORT_JOB_MAX_QUEUE', 20):
+            return None
+        _inflight += 1
+
+    job = {
+        "id": str(uuid.uuid4()),
+        "report": report,
+        "status": "queued",
+        "params": {"start_date": start_day.isoformat(), "end_date": end_day.isoformat(), **filters},
+        "requested_by": requested_by,
+        "created_at": datetime.utcnow().isoformat()
+    }
+    try:
+        _save_job(job)
+        app = current_app._get_current_object()
+        _get_executor().submit(_run_job, app, job, start_day, end_day, filters)
+    except Exception:
+        with _executor_lock:
+            _inflight -= 1
+        raise
+    return job
+
+
+def _run_job(app, job, start_day, end_day, filters):
+    global _inflight
+    with app.app_context():
+        try:
+            _save_job({**job, "status": "running", "started_at": datetime.utcnow().isoformat()})
+            result = report_service.run_report(job['report'], start_day, end_day, filters)
+            _save_job({**job, "status": "done", "result": result,
+                       "finished_at": datetime.utcnow().isoformat()})
+        except Exception as e:
+            print(f"⚠️ Erro no relatório em segundo plano {job['id']}: {e}")
+            try:
+                _save_job({**job, "status": "error", "error": str(e),
+                           "finished_at": datetime.utcnow().isoformat()})
+            except Exception as save_error:
+                print(f"⚠️ Não foi possível salvar o erro do job {job['id']}: {save_error}")
+        finally:
+            db.session.remove()  # Devolve a conexão ao pool
+            with _executor_lock:
+                _inflight -= 1
@@ -0,0 +1,446 @@
+from ..models import Order, OrderItem, Product, DailySalesRollup, db
+from sqlalchemy import func, insert, extract
+from datetime import datetime, timezone
+from decimal import Decimal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from flask import current_app
+import ast
+import json
+from ..utils.cache import get_redis, LocalTTLCache
+from ..utils.upsert import upsert_insert
+from .product_service import PRICED_OPTION_TYPES, get_product_options_table
+
+# ==============================================================================
+# 📊 ROLLUP DIÁRIO DE VENDAS
+# ==============================================================================
+# Cada pedido que entra (ou sai) de 'Concluído' soma (ou subtrai) seus valores
+# na linha (dia, forma de pagamento). O dashboard passa a ler no máximo
+# 1 linha por dia/pagamento, não importa quantos pedidos existam no histórico.
+COMPLETED_STATUS = 'Concluído'
+
+
+def _rollup_key(order):
+    return order.date_created.date(), order.payment_method or ''
+
+
+def apply_order_to_rollup(order, sign):
+    """
+    Soma (sign=1) ou subtrai (sign=-1) o pedido no rollup do dia.
+    NÃO faz commit: roda dentro da transação de quem mudou o status.
+    Usa UPSERT atômico, então dois admins concluindo pedidos do mesmo dia
+    ao mesmo tempo não perdem nenhuma soma.
+    """
+    day, payment_method = _rollup_key(order)
+    revenue = Decimal(order.total_price or 0) * sign
+    fees = Decimal(order.delivery_fee or 0) * sign
+
+    stmt = upsert_insert(DailySalesRollup).values(
+        day=day,
+        payment_method=payment_method,
+        revenue=revenue,
+        order_count=sign,
+        delivery_fees=fees
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['day', 'payment_method'],
+        set_={
+            'revenue': DailySalesRollup.revenue + stmt.excluded.revenue,
+            'order_count': DailySalesRollup.order_count + stmt.excluded.order_count,
+            'delivery_fees': DailySalesRollup.delivery_fees + stmt.excluded.delivery_fees,
+        }
+    )
+    db.session.execute(stmt)
+
+
+def track_status_change(order, old_status, new_status):
+    """
+    Atualiza o rollup só quando o pedido entra ou sai de 'Concluído'.
+    Retorna o dia afetado (para invalidar o cache DEPOIS do commit) ou None.
+    """
+    if old_status == new_status:
+        return None
+    if new_status == COMPLETED_STATUS:
+        apply_order_to_rollup(order, 1)
+    elif old_status == COMPLETED_STATUS:
+        apply_order_to_rollup(order, -1)
+    else:
+        return None
+    return order.date_created.date()
+
+
+# ==============================================================================
+# ⚡ CACHE DOS RELATÓRIOS (Chave = filtros normalizados)
+# ==============================================================================
+# Períodos fechados (terminam antes de hoje) quase nunca mudam: ficam em cache
+# até alguém mexer num pedido antigo. Períodos que incluem HOJE mudam a cada
+# pedido concluído: usam TTL curto E a versão 'live', incrementada a cada
+# mudança de status, então o admin nunca vê número velho por mais que isso.
+#
+# Chaves:
+#   report:version:live      -> muda quando um pedido de hoje entra/sai de 'Concluído'
+#   report:version:history   -> muda quando o pedido alterado é de um dia anterior
+#   report:stats             -> HASH com hits/misses (todas as instâncias)
+REPORT_VERSION_KEY = 'report:version:{}'
+REPORT_STATS_KEY = 'report:stats'
+LIVE_REPORT_TTL = 30  # Segundos
+HISTORY_REPORT_TTL = 60 * 60 * 24 * 7  # No Redis, versões antigas expiram sozinhas
+REPORT_FORMAT = 2  # Suba quando o formato de um relatório mudar (o cache antigo deixa de valer)
+
+_local_report_cache = LocalTTLCache(maxsize=512)
+_local_report_versions = {'live': 0, 'history': 0}
+_local_report_stats = {'hits': 0, 'misses': 0}
+
+
+def _report_versions():
+    redis = get_redis()
+    if redis:
+        try:
+            live, history = redis.mget(REPORT_VERSION_KEY.format('live'), REPORT_VERSION_KEY.format('history'))
+            return int(live or 0), int(history or 0)
+        except Exception as e:
+            print(f"⚠️ Redis indisponível para versão dos relatórios: {e}")
+    return _local_report_versions['live'], _local_report_versions['history']
+
+
+def invalidate_reports(day):
+    """Chamar DEPOIS do commit que alterou o rollup do dia informado."""
+    scope = 'live' if day >= datetime.utcnow().date() else 'history'
+    _local_report_versions[scope] += 1
+
+    redis = get_redis()
+    if redis:
+        try:
+            redis.incr(REPORT_VERSION_KEY.format(scope))
+        except Exception as e:
+            print(f"⚠️ Erro ao invalidar cache dos relatórios: {e}")
+
+
+def _count_cache(outcome):
+    _local_report_stats[outcome] += 1
+
+    redis = get_redis()
+    if redis:
+        try:
+            redis.hincrby(REPORT_STATS_KEY, outcome, 1)
+        except Exception:
+            pass  # Contador é só métrica: nunca derruba o relatório
+
+
+def get_report_cache_stats():
+    """Hits/misses do cache dos relatórios (globais se houver Redis, senão do processo)."""
+    stats = dict(_local_report_stats)
+    backend = 'local'
+
+    redis = get_redis()
+    if redis:
+        try:
+            raw = redis.hgetall(REPORT_STATS_KEY)
+            stats = {k: int(raw.get(k.encode(), raw.get(k, 0))) for k in ('hits', 'misses')}
+            backend = 'redis'
+        except Exception as e:
+            print(f"⚠️ Erro ao ler métricas do cache dos relatórios: {e}")
+
+    total = stats['hits'] + stats['misses']
+    return {
+        "backend": backend,
+        "hits": stats['hits'],
+        "misses": stats['misses'],
+        "hit_rate": round(stats['hits'] / total, 4) if total else 0.0
+    }
+
+
+def cached_report(name, start_day, end_day, filters, compute):
+    """
+    Devolve o resultado de compute() para estes filtros, do cache se possível.
+    name: nome do relatório ('dashboard', ...).
+    filters: dict com os demais filtros (valores None são ignorados).
+    """
+    live, history = _report_versions()
+    normalized = "&".join(f"{k}={filters[k]}" for k in sorted(filters) if filters[k] not in (None, ''))
+
+    if end_day >= datetime.utcnow().date():
+        key = f"report:{name}:f{REPORT_FORMAT}:v{history}.{live}:{start_day}:{end_day}:{normalized}"
+        ttl = LIVE_REPORT_TTL
+    else:
+        key = f"report:{name}:f{REPORT_FORMAT}:v{history}:{start_day}:{end_day}:{normalized}"
+        ttl = HISTORY_REPORT_TTL
+
+    redis = get_redis()
+    if redis:
+        try:
+            raw = redis.get(key)
+            if raw is not None:
+                _count_cache('hits')
+                return json.loads(raw)
+        except Exception as e:
+            print(f"⚠️ Erro ao ler relatório do Redis: {e}")
+    else:
+        cached = _local_report_cache.get(key)
+        if cached is not None:
+            _count_cache('hits')
+            return cached
+
+    _count_cache('misses')
+    result = compute()
+
+    if redis:
+        try:
+            redis.set(key, json.dumps(result), ex=ttl)
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar relatório no Redis: {e}")
+    else:
+        # Local: período fechado fica até sair pelo LRU (a versão já invalida)
+        _local_report_cache.set(key, result, ttl if ttl == LIVE_REPORT_TTL else None)
+    return result
+
+
+def rebuild_daily_rollup():
+    """
+    Backfill: apaga o rollup e recalcula a partir do histórico de pedidos.
+    Uma única transação (INSERT ... SELECT ... GROUP BY), sem trazer pedidos
+    para o Python. Retorna quantas linhas foram geradas.
+    """
+    day = func.date(Order.date_created)
+    payment_method = func.coalesce(Order.payment_method, '')
+
+    summary = db.session.query(
+        day,
+        payment_method,
+        func.coalesce(func.sum(Order.total_price), 0),
+        func.count(Order.id),
+        func.coalesce(func.sum(Order.delivery_fee), 0)
+    ).filter(Order.status == COMPLETED_STATUS) \
+        .group_by(day, payment_method)
+
+    try:
+        db.session.query(DailySalesRollup).delete(synchronize_session=False)
+        db.session.execute(
+            insert(DailySalesRollup).from_select(
+                ['day', 'payment_method', 'revenue', 'order_count', 'delivery_fees'],
+                summary.statement
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Backfill pode mudar qualquer dia: descarta todo o cache dos relatórios
+    invalidate_reports(datetime.min.date())
+    invalidate_reports(datetime.utcnow().date())
+    return db.session.query(func.count()).select_from(DailySalesRollup).scalar()
+
+
+def get_dashboard_stats(start_day, end_day, payment_method=None):
+    """
+    Totais e gráfico do dashboard entre dois dias (inclusive), lidos do rollup.
+    start_day/end_day: datetime.date.
+    """
+    query = db.session.query(
+        DailySalesRollup.day,
+        func.sum(DailySalesRollup.revenue),
+        func.sum(DailySalesRollup.order_count),
+        func.sum(DailySalesRollup.delivery_fees)
+    ).filter(DailySalesRollup.day.between(start_day, end_day))
+
+    if payment_method:
+        query = query.filter(DailySalesRollup.payment_method == payment_method)
+
+    # Dias cujo saldo voltou a zero (pedido "desconcluído") não entram no gráfico
+    rows = [r for r in query.group_by(DailySalesRollup.day).order_by(DailySalesRollup.day).all() if r[2]]
+
+    return {
+        "total_periodo": float(sum((r[1] for r in rows), Decimal('0'))),
+        "qtd_pedidos": int(sum(r[2] for r in rows)),
+        "total_taxas_entrega": float(sum((r[3] for r in rows), Decimal('0'))),
+        "grafico": {
+            "labels": [str(r[0]) for r in rows],
+            "data": [float(r[1]) for r in rows]
+        }
+    }
+
+
+# ==============================================================================
+# 🍔 ANALÍTICO DE PRODUTOS E ADICIONAIS
+# ==============================================================================
+# O banco agrupa os itens por (produto, hora, customização): um ano de pedidos
+# vira poucos milhares de linhas, porque a maioria dos lanches sai com as
+# mesmas combinações. Cada combinação distinta é decodificada UMA vez e o
+# resultado é multiplicado pelas unidades do grupo.
+
+def _parse_customizations(raw):
+    """customizations_json -> dict. Pedidos antigos foram salvos como str(dict)."""
+    if not raw:
+        return {}
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        try:
+            parsed = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _addons_of(product_id, raw, options, parsed_cache):
+    """
+    Conjunto de (tipo, nome) dos opcionais escolhidos no item que existem na
+    tabela de preços do produto (a mesma que o checkout cobra). Nome antigo
+    ou inventado no JSON não conta; produto removido não tem tabela.
+    """
+    key = (product_id, raw)
+    if key not in parsed_cache:
+        custom = _parse_customizations(raw)
+        parsed_cache[key] = frozenset(
+            (tipo, nome)
+            for tipo in PRICED_OPTION_TYPES
+            for nome in (custom.get(tipo) or [])
+            if isinstance(nome, str) and (tipo, nome) in options
+        )
+    return parsed_cache[key]
+
+
+def _store_hours(day):
+    """
+    Mapa {hora UTC: hora no fuso da loja (STORE_TIMEZONE)} usando o deslocamento
+    do dia informado. Retorna (mapa, nome_do_fuso); fuso inválido cai em UTC.
+    """
+    tz_name = current_app.config.get('STORE_TIMEZONE') or 'UTC'
+    try:
+        tz = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"⚠️ STORE_TIMEZONE inválido ({tz_name}): relatório por hora em UTC")
+        return {h: h for h in range(24)}, 'UTC'
+
+    base = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    return {h: base.replace(hour=h).astimezone(tz).hour for h in range(24)}, tz_name
+
+
+def _new_bucket():
+    return {"units": 0, "revenue": Decimal('0'), "addon_units": 0}
+
+
+def _add_to_bucket(bucket, units, revenue, has_addon):
+    bucket["units"] += units
+    bucket["revenue"] += revenue
+    if has_addon:
+        bucket["addon_units"] += units
+
+
+def _bucket_json(bucket):
+    units = bucket["units"]
+    return {
+        "units": units,
+        "revenue": float(bucket["revenue"]),
+        "addon_attach_rate": round(bucket["addon_units"] / units, 4) if units else 0.0
+    }
+
+
+def get_product_sales_stats(start_day, end_day):
+    """
+    Unidades, receita e taxa de adicionais por produto, categoria e hora do dia,
+    considerando só pedidos CONCLUÍDOS entre dois dias (UTC, inclusive).
+    As horas saem no fuso da loja (STORE_TIMEZONE, informado em "fuso_horario"),
+    com o deslocamento do último dia do período.
+    addon_attach_rate = fração das unidades vendidas com pelo menos 1 opcional
+    da tabela de preços do produto.
+    """
+    start = datetime.combine(start_day, datetime.min.time())
+    end = datetime.combine(end_day, datetime.max.time())
+    hour = extract('hour', Order.date_created)
+
+    grouped = db.session.query(
+        OrderItem.product_id,
+        hour,
+        OrderItem.customizations_json,
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.price_at_time * OrderItem.quantity)
+    ).join(Order, Order.id == OrderItem.order_id) \
+        .filter(Order.status == COMPLETED_STATUS, Order.date_created.between(start, end)) \
+        .group_by(OrderItem.product_id, hour, OrderItem.customizations_json) \
+        .all()
+
+    product_ids = {row[0] for row in grouped}
+    catalog, options_by_product = {}, {}
+    if product_ids:
+        for row in db.session.query(Product.id, Product.name, Product.category, Product.details_json) \
+                .filter(Product.id.in_(product_ids)):
+            catalog[row.id] = (row.name, row.category)
+            options_by_product[row.id] = get_product_options_table(row)
+
+    store_hour, tz_name = _store_hours(end_day)
+    parsed_cache = {}
+    total = _new_bucket()
+    by_product, by_category, by_hour, addon_units = {}, {}, {}, {}
+
+    for product_id, item_hour, raw_custom, units, revenue in grouped:
+        units = int(units or 0)
+        revenue = Decimal(revenue or 0)
+        addons = _addons_of(product_id, raw_custom, options_by_product.get(product_id, {}), parsed_cache)
+        category = catalog.get(product_id, (None, None))[1] or 'Sem categoria'
+
+        _add_to_bucket(total, units, revenue, addons)
+        _add_to_bucket(by_product.setdefault(product_id, _new_bucket()), units, revenue, addons)
+        _add_to_bucket(by_category.setdefault(category, _new_bucket()), units, revenue, addons)
+        _add_to_bucket(by_hour.setdefault(store_hour[int(item_hour)], _new_bucket()), units, revenue, addons)
+
+        per_product = addon_units.setdefault(product_id, {})
+        for addon in addons:
+            per_product[addon] = per_product.get(addon, 0) + units
+
+    produtos = []
+    for product_id, bucket in by_product.items():
+        name, category = catalog.get(product_id, (f"Produto #{product_id} (removido)", None))
+        adicionais = [
+            {"tipo": tipo, "nome": nome, "units": qtd,
+             "attach_rate": round(qtd / bucket["units"], 4) if bucket["units"] else 0.0}
+            for (tipo, nome), qtd in addon_units[product_id].items()
+        ]
+        adicionais.sort(key=lambda a: a["units"], reverse=True)
+        produtos.append({
+            "product_id": product_id,
+            "name": name,
+            "category": category or 'Sem categoria',
+            **_bucket_json(bucket),
+            "adicionais": adicionais
+        })
+    produtos.sort(key=lambda p: p["units"], reverse=True)
+
+    categorias = [{"category": c, **_bucket_json(b)} for c, b in by_category.items()]
+    categorias.sort(key=lambda c: c["units"], reverse=True)
+
+    return {
+        "periodo": {"start_date": start_day.isoformat(), "end_date": end_day.isoformat()},
+        "fuso_horario": tz_name,  # Fuso das horas em "por_hora"
+        "total": _bucket_json(total),
+        "produtos": produtos,
+        "categorias": categorias,
+        "por_hora": [{"hour": h, **_bucket_json(by_hour[h])} for h in sorted(by_hour)]
+    }
+
+
+# ==============================================================================
+# 🗂️ CATÁLOGO DE RELATÓRIOS
+# ==============================================================================
+# Rotas e jobs em segundo plano chamam run_report pelo nome, sempre passando
+# pelo cache. REPORT_FILTERS diz quais filtros extras cada relatório aceita.
+REPORT_FILTERS = {
+    'dashboard': ('payment_method',),
+    'products': (),
+}
+
+_REPORT_BUILDERS = {
+    'dashboard': get_dashboard_stats,
+    'products': get_product_sales_stats,
+}
+
+
+def run_report(name, start_day, end_day, filters=None):
+    if name not in REPORT_FILTERS:
+        raise ValueError(f"Relatório desconhecido: {name}")
+
+    filters = {key: (filters or {}).get(key) for key in REPORT_FILTERS[name]}
+    return cached_report(
+        name, start_day, end_day, filters,
+        lambda: _REPORT_BUILDERS[name](start_day, end_day, **filters)
+    )
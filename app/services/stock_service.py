@@ -0,0 +1,374 @@
+import time
+import secrets
+from flask import current_app
+from ..models import Product, db
+from ..extensions import socketio
+from ..utils.cache import get_redis
+
+# ==============================================================================
+# 📦 MOTOR DE RESERVA DE ESTOQUE (Redis + Lua)
+# ==============================================================================
+# Em promoções relâmpago, todo checkout disputava a MESMA linha do Product
+# (SELECT ... FOR UPDATE). Com o motor ligado (REDIS_STOCK_ENGINE=true), o
+# saldo vive no Redis e é baixado atomicamente por um script Lua. O Postgres
+# recebe o saldo depois, em segundo plano (write-back), e um job de
+# reconciliação corrige qualquer divergência.
+#
+# Chaves:
+#   stock:<product_id>          -> saldo atual (inteiro)
+#   stock_version:<product_id>  -> Product.stock_version de onde o saldo partiu
+#   stock:dirty                 -> SET com ids que precisam ser gravados no banco
+#   stock:flushing              -> ids que um write-back pegou e ainda não gravou
+#   stock:flush_lock            -> impede dois write-backs simultâneos (valor = token
+#                                  de quem segura; só ele apaga, via RELEASE_LOCK_LUA)
+#
+# Versão: toda escrita de estoque fora do write-back (admin, checkout sem o
+# motor) sobe Product.stock_version. O write-back só grava com
+# "WHERE stock_version = <versão do Redis>": se o admin gravou 100 enquanto o
+# write-back ainda segurava o saldo antigo, o UPDATE não acha a linha e o
+# Redis adota o valor do banco (SYNC_LUA nunca troca versão nova por velha).
+
+STOCK_KEY = 'stock:{}'
+VERSION_KEY = 'stock_version:{}'
+DIRTY_KEY = 'stock:dirty'
+FLUSHING_KEY = 'stock:flushing'
+FLUSH_LOCK_KEY = 'stock:flush_lock'
+FLUSH_DELAY_SECONDS = 1  # Agrupa várias vendas num único UPDATE
+FLUSH_LOCK_TTL_MS = 30000
+FLUSH_BATCH = 1000
+
+RESERVE_LUA = """
+local missing = {}
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 0 then
+        table.insert(missing, key)
+    end
+end
+if #missing > 0 then
+    return {'missing', unpack(missing)}
+end
+
+local short = {}
+for i, key in ipairs(KEYS) do
+    local current = tonumber(redis.call('GET', key))
+    if current < tonumber(ARGV[i]) then
+        table.insert(short, key)
+        table.insert(short, current)
+    end
+end
+if #short > 0 then
+    return {'short', unpack(short)}
+end
+
+for i, key in ipairs(KEYS) do
+    redis.call('DECRBY', key, ARGV[i])
+end
+return {'ok'}
+"""
+
+# Copia saldo/versão do banco para o Redis se a chave não existir ou se a
+# versão do Redis for mais velha. Saldo vazio ('') = produto sem controle.
+SYNC_LUA = """
+local current = tonumber(redis.call('GET', KEYS[2]) or '-1')
+if redis.call('EXISTS', KEYS[1]) == 1 and current >= tonumber(ARGV[2]) then
+    return 0
+end
+if ARGV[1] == '' then
+    redis.call('DEL', KEYS[1], KEYS[2])
+else
+    redis.call('SET', KEYS[1], ARGV[1])
+    redis.call('SET', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+# Solta o lock só se ainda for nosso: um write-back que passou do TTL (ou que
+# terminou enquanto a reconciliação segurava o lock) não apaga o lock alheio.
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Pega um lote de ids sujos para gravar. O que sobrou em stock:flushing é de
+# um write-back que morreu antes do commit (só roda um por vez, pelo lock):
+# volta para stock:dirty antes de sortear o lote.
+CLAIM_LUA = """
+for _, pid in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+    redis.call('SADD', KEYS[1], pid)
+end
+redis.call('DEL', KEYS[2])
+local ids = redis.call('SPOP', KEYS[1], ARGV[1])
+for _, pid in ipairs(ids) do
+    redis.call('SADD', KEYS[2], pid)
+end
+return ids
+"""
+
+
+def is_enabled():
+    """O motor só liga com Redis configurado E a flag REDIS_STOCK_ENGINE."""
+    return bool(current_app.config.get('REDIS_STOCK_ENGINE')) and get_redis() is not None
+
+
+def _key(product_id):
+    return STOCK_KEY.format(product_id)
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _version_key(product_id):
+    return VERSION_KEY.format(product_id)
+
+
+def _sync_key(redis, product_id, stock, version):
+    """Roda o SYNC_LUA para um produto. Retorna True se o Redis mudou."""
+    keys = (_key(product_id), _version_key(product_id))
+    return bool(redis.eval(SYNC_LUA, 2, *keys, '' if stock is None else stock, version))
+
+
+def _sync_from_db(redis, product_ids):
+    """
+    Traz o saldo do banco para o Redis quando a chave falta ou está numa
+    versão mais velha. Retorna quantas chaves mudaram.
+    """
+    rows = db.session.query(Product.id, Product.stock_quantity, Product.stock_version) \
+        .filter(Product.id.in_(product_ids)) \
+        .all()
+    return sum(_sync_key(redis, *row) for row in rows)
+
+
+def reserve_stock(wanted, products):
+    """
+    Baixa o estoque de vários produtos atomicamente no Redis.
+    wanted: {product_id: quantidade} (apenas produtos com estoque controlado).
+    products: {product_id: Product} para montar as mensagens de erro.
+    Levanta ValueError listando TODOS os produtos sem saldo.
+    """
+    if not wanted:
+        return {}
+
+    redis = get_redis()
+    ids = sorted(wanted)
+    keys = [_key(pid) for pid in ids]
+    quantities = [wanted[pid] for pid in ids]
+
+    for _ in range(2):
+        result = [_decode(v) for v in redis.eval(RESERVE_LUA, len(keys), *keys, *quantities)]
+
+        if result[0] == 'ok':
+            redis.sadd(DIRTY_KEY, *ids)
+            _schedule_flush()
+            return dict(wanted)
+
+        if result[0] == 'missing':
+            # Primeira venda desde o deploy/reconciliação: semeia e tenta de novo
+            _sync_from_db(redis, [int(k.split(':')[1]) for k in result[1:]])
+            continue
+
+        problems = []
+        for key, current in zip(result[1::2], result[2::2]):
+            product = products[int(key.split(':')[1])]
+            problems.append(f"Estoque insuficiente para '{product.name}'. Restam: {current}.")
+        raise ValueError(" ".join(problems))
+
+    raise ValueError("Não foi possível reservar o estoque. Tente novamente.")
+
+
+def release_stock(reserved):
+    """
+    Devolve estoque ao Redis (cancelamento ou falha no checkout).
+    reserved: {product_id: quantidade}.
+    """
+    if not reserved:
+        return
+
+    redis = get_redis()
+    pipe = redis.pipeline()
+    for product_id, qtd in reserved.items():
+        pipe.incrby(_key(product_id), qtd)
+    pipe.sadd(DIRTY_KEY, *reserved.keys())
+    pipe.execute()
+    _schedule_flush()
+
+
+def reset_product_stock(product_id, stock_quantity, stock_version):
+    """
+    Admin editou o estoque no banco (commit já feito, versão já subiu):
+    o Redis passa a valer o novo número, descartando o saldo antigo.
+    """
+    _sync_key(get_redis(), product_id, stock_quantity, stock_version)
+
+
+def _claim_dirty(redis, count=FLUSH_BATCH):
+    return [int(_decode(pid)) for pid in redis.eval(CLAIM_LUA, 2, DIRTY_KEY, FLUSHING_KEY, count) or []]
+
+
+def _write_back(product_ids, values, versions):
+    """
+    UPDATE com compare-and-set na versão. Retorna (gravados, divergentes):
+    divergentes são os ids cuja versão no banco mudou (ou que deixaram de
+    controlar estoque) e precisam adotar o valor do banco.
+    Não faz commit.
+    """
+    written, stale = [], []
+    for product_id, value, version in zip(product_ids, values, versions):
+        if value is None:
+            continue  # Chave apagada (produto sem controle): nada a gravar
+        if version is None:
+            stale.append(product_id)  # Chave sem versão (anterior a ela): o banco manda
+            continue
+        updated = Product.query.filter(
+            Product.id == product_id,
+            Product.stock_quantity.isnot(None),
+            Product.stock_version == int(version)
+        ).update({Product.stock_quantity: int(value)}, synchronize_session=False)
+        (written if updated else stale).append(product_id)
+    return written, stale
+
+
+def flush_stock_to_db():
+    """
+    Write-back: grava no Postgres o saldo atual dos produtos marcados como sujos.
+    Cada UPDATE é curto e fora do checkout, então não segura nenhum cliente.
+    Os ids ficam em stock:flushing até o commit: se o processo morrer no
+    meio, o próximo write-back (ou a reconciliação) pega de novo.
+    Retorna quantos produtos foram gravados.
+    """
+    redis = get_redis()
+    product_ids = _claim_dirty(redis)
+    if not product_ids:
+        return 0
+
+    # Saldo e versão lidos no MESMO comando (MGET é atômico)
+    raw = redis.mget([_key(pid) for pid in product_ids] + [_version_key(pid) for pid in product_ids])
+    values, versions = raw[:len(product_ids)], raw[len(product_ids):]
+    try:
+        written, stale = _write_back(product_ids, values, versions)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        redis.sadd(DIRTY_KEY, *product_ids)  # Tenta de novo no próximo ciclo
+        redis.delete(FLUSHING_KEY)
+        raise
+
+    redis.delete(FLUSHING_KEY)
+    if stale:
+        _sync_from_db(redis, stale)
+
+    # O cardápio exibe o estoque: só muda quando o banco muda
+    if written:
+        from . import product_service
+        product_service.bump_menu_version()
+    return len(written)
+
+
+def _try_flush_lock(redis):
+    """Tenta pegar o lock do write-back. Retorna o token (para soltar) ou None."""
+    token = secrets.token_hex(16)
+    if redis.set(FLUSH_LOCK_KEY, token, nx=True, px=FLUSH_LOCK_TTL_MS):
+        return token
+    return None
+
+
+def _release_flush_lock(redis, token):
+    redis.eval(RELEASE_LOCK_LUA, 1, FLUSH_LOCK_KEY, token)
+
+
+def _schedule_flush():
+    """Agenda um write-back (no máximo um por vez) em segundo plano."""
+    redis = get_redis()
+    token = _try_flush_lock(redis)
+    if not token:
+        return  # Já tem um agendado; ele vai pegar estes ids também
+
+    app = current_app._get_current_object()
+
+    def _flush():
+        socketio.sleep(FLUSH_DELAY_SECONDS)
+        with app.app_context():
+            try:
+                flush_stock_to_db()
+            except Exception as e:
+                print(f"⚠️ Erro no write-back de estoque: {e}")
+            finally:
+                _release_flush_lock(redis, token)
+                if redis.scard(DIRTY_KEY):
+                    _schedule_flush()
+
+    socketio.start_background_task(_flush)
+
+
+def _acquire_flush_lock(redis, timeout=FLUSH_LOCK_TTL_MS / 1000):
+    """Espera o write-back em andamento terminar e segura o lock. Retorna o token."""
+    deadline = time.monotonic() + timeout
+    while True:
+        token = _try_flush_lock(redis)
+        if token:
+            return token
+        if time.monotonic() > deadline:
+            raise ValueError("Write-back de estoque em andamento. Tente de novo em instantes.")
+        time.sleep(0.1)
+
+
+def reconcile_stock():
+    """
+    Job de reconciliação (rodar via db_service.py ou agendador).
+    Segura o mesmo lock do write-back e:
+    1. Grava no banco tudo que ainda estiver pendente (inclusive ids de um
+       write-back que morreu no meio).
+    2. Remove do Redis produtos que não controlam mais estoque / foram apagados.
+    3. Compara TODA chave controlada com o banco:
+       - mesma versão e saldo diferente -> o Redis manda, grava no banco
+         (id sujo que se perdeu);
+       - versão diferente ou chave faltando -> o banco manda, vai pro Redis.
+    Retorna um resumo do que foi feito.
+    """
+    redis = get_redis()
+    token = _acquire_flush_lock(redis)
+    try:
+        flushed = 0
+        while redis.scard(DIRTY_KEY) or redis.scard(FLUSHING_KEY):
+            flushed += flush_stock_to_db()
+
+        tracked = {
+            row.id: row for row in db.session.query(Product.id, Product.stock_quantity, Product.stock_version)
+            .filter(Product.stock_quantity.isnot(None))
+            .all()
+        }
+
+        removed = 0
+        for pattern in (STOCK_KEY, VERSION_KEY):
+            for key in redis.scan_iter(match=pattern.format('*')):
+                suffix = _decode(key).split(':')[1]
+                if suffix.isdigit() and int(suffix) not in tracked:
+                    redis.delete(key)
+                    removed += 1
+
+        ids = sorted(tracked)
+        raw = redis.mget([_key(pid) for pid in ids] + [_version_key(pid) for pid in ids]) if ids else []
+        values, versions = raw[:len(ids)], raw[len(ids):]
+
+        to_write, to_sync = {}, []
+        for product_id, value, version in zip(ids, values, versions):
+            row = tracked[product_id]
+            if value is not None and version is not None and int(version) == row.stock_version:
+                if int(value) != row.stock_quantity:
+                    to_write[product_id] = (value, version)
+            else:
+                to_sync.append(product_id)
+
+        written, stale = _write_back(list(to_write), *zip(*to_write.values())) if to_write else ([], [])
+        db.session.commit()
+        synced = _sync_from_db(redis, to_sync + stale) if to_sync or stale else 0
+    finally:
+        _release_flush_lock(redis, token)
+
+    if written:
+        from . import product_service
+        product_service.bump_menu_version()
+
+    return {"flushed": flushed, "removed": removed, "written": len(written), "synced": synced}
@@ -6,6 +6,7 @@ import {
   updateOrderStatus,
   fetchAdminConversations,
   fetchAdminUserHistory,
+  markAdminConversationRead,
   sendAdminReply,
   uploadImage,
   createProduct,
@@ -26,13 +27,16 @@ import {
   fetchOrderDossier,
 } from "./api.js";
 import { getSession, clearSession, logout } from "./auth.js";
+import { conectarSocket } from "./socket.js";
 import { showToast } from "./utils.js";
 
 // --- Variáveis de Estado ---
 let chatUserIdAtivo = null;
+let ultimoIdChatAtivo = null; // Última mensagem exibida (cursor do after_id)
 let produtoEmEdicaoId = null; // null = criando, número = editando
 let idParaDeletar = null; // Para o modal de segurança
 let pedidosDoDia = [];
+let filtrosPedidosAtuais = null; // Filtros da lista de pedidos (usados no "Carregar mais")
 let chartInstance = null;
 
 // =============================================================================
@@ -61,7 +65,9 @@ document.addEventListener("DOMContentLoaded", () => {
   const socketUrl = isLocalhost ? "http://localhost:5000" : ""; // Ajuste conforme seu api.js
 
   try {
-    const socket = io(socketUrl);
+    // Cookie no handshake: o servidor coloca este socket na sala "admins"
+    // (e o conectarSocket reconecta depois de cada refresh do token)
+    const socket = conectarSocket(socketUrl);
 
     socket.on("connect", () => {
       console.log("🟢 Conectado ao sistema de pedidos em tempo real!");
@@ -99,12 +105,14 @@ document.addEventListener("DOMContentLoaded", () => {
       // 2. Se estiver com o chat desse usuário aberto, adiciona na tela
       if (chatUserIdAtivo === msg.user_id) {
         const container = document.getElementById("admin-chat-messages");
-        if (container) {
-          container.innerHTML += `<div class="msg ${
-            msg.is_from_admin ? "msg-admin" : "msg-user"
-          }">${msg.message}</div>`;
+        // Pode já ter chegado pelo after_id (atualizarChatAtivo)
+        if (container && !(ultimoIdChatAtivo !== null && msg.id <= ultimoIdChatAtivo)) {
+          container.innerHTML += htmlMensagemChat(msg);
+          ultimoIdChatAtivo = msg.id;
           container.scrollTop = container.scrollHeight;
         }
+        // Conversa aberta na tela: a mensagem já foi lida
+        if (!msg.is_from_admin) markAdminConversationRead(msg.user_id);
       } else {
         // Se não estiver aberto, mostra notificação
         if (!msg.is_from_admin)
@@ -165,7 +173,10 @@ window.adminLogout = adminLogout;
 // --- COZINHA (KDS) ---
 
 async function carregarCozinha() {
-  const pedidos = await fetchAdminOrders();
+  // Visão padrão da API (hoje + em aberto) numa página só, no limite máximo:
+  // a fila da cozinha não pode ficar pela metade
+  const { orders: pedidos, next_cursor } = await fetchAdminOrders({ limit: 500 });
+  if (next_cursor) showToast("Muitos pedidos em aberto: a cozinha mostra os 500 mais recentes.");
   pedidosDoDia = pedidos;
 
   const espera = pedidos.filter((p) => p.status === "Recebido");
@@ -322,10 +333,14 @@ async function concluirPedidoDefinitivo(id) {
 
 // --- HISTÓRICO DE PEDIDOS ---
 
-async function carregarPedidosAdmin(filtrosOpcionais = null) {
+async function carregarPedidosAdmin(filtrosOpcionais = null, cursor = null) {
   const container = document.getElementById("admin-orders-list");
   const btn = document.querySelector("#panel-orders .btn-outline");
 
+  // Primeira página troca a lista; "Carregar mais" só acrescenta
+  const botaoMais = document.getElementById("admin-orders-mais");
+  if (botaoMais) botaoMais.remove();
+
   if (btn) btn.innerHTML = '<i class="fa-solid fa-rotate fa-spin"></i> ...';
 
   let filtrosFinais = filtrosOpcionais;
@@ -333,19 +348,41 @@ async function carregarPedidosAdmin(filtrosOpcionais = null) {
     const hoje = new Date().toISOString().split("T")[0];
     filtrosFinais = { start_date: hoje, end_date: hoje };
   }
+  filtrosPedidosAtuais = filtrosFinais;
 
-  const pedidos = await fetchAdminOrders(filtrosFinais);
-  pedidosDoDia = pedidos;
+  const { orders: pedidos, next_cursor } = await fetchAdminOrders(
+    filtrosFinais,
+    cursor
+  );
+  pedidosDoDia = cursor ? [...pedidosDoDia, ...pedidos] : pedidos;
 
   if (!container) return;
 
-  container.innerHTML = pedidos.length
-    ? pedidos.map((p) => renderOrderCard(p)).join("")
-    : '<div style="text-align:center; padding:20px; color:#666; grid-column: 1 / -1;">Nenhum pedido encontrado com estes filtros.</div>';
+  const cards = pedidos.map((p) => renderOrderCard(p)).join("");
+  if (cursor) {
+    container.insertAdjacentHTML("beforeend", cards);
+  } else {
+    container.innerHTML = pedidos.length
+      ? cards
+      : '<div style="text-align:center; padding:20px; color:#666; grid-column: 1 / -1;">Nenhum pedido encontrado com estes filtros.</div>';
+  }
+
+  if (next_cursor) {
+    container.insertAdjacentHTML(
+      "beforeend",
+      `<div id="admin-orders-mais" style="text-align:center; padding:10px; grid-column: 1 / -1;">
+          <button class="btn-small" onclick="window.carregarMaisPedidosAdmin('${next_cursor}')">Carregar mais</button>
+      </div>`
+    );
+  }
 
   if (btn) btn.innerHTML = '<i class="fa-solid fa-rotate"></i> Atualizar';
 }
 
+function carregarMaisPedidosAdmin(cursor) {
+  carregarPedidosAdmin(filtrosPedidosAtuais, cursor);
+}
+
 function renderOrderCard(p) {
   const time = new Date(p.date_created).toLocaleTimeString([], {
     hour: "2-digit",
@@ -752,12 +789,17 @@ async function carregarListaConversas() {
         }" 
              onclick="window.selecionarChat(${u.user_id}, '${u.user_name}')">
             <div class="user-avatar-small">${u.user_name[0].toUpperCase()}</div>
-            <div style="flex:1">
+            <div style="flex:1; min-width:0">
                 <div>${u.user_name}</div>
                 <small style="color:#888">${new Date(u.last_interaction)
                   .toLocaleTimeString()
-                  .slice(0, 5)}</small>
+                  .slice(0, 5)} · ${u.last_message_preview || ""}</small>
             </div>
+            ${
+              u.unread_by_admin > 0 && chatUserIdAtivo !== u.user_id
+                ? `<span class="badge-count">${u.unread_by_admin}</span>`
+                : ""
+            }
         </div>
     `
     )
@@ -766,10 +808,17 @@ async function carregarListaConversas() {
 
 function selecionarChat(id, nome) {
   chatUserIdAtivo = id;
+  ultimoIdChatAtivo = null;
   const inputArea = document.getElementById("admin-chat-input-area");
   if (inputArea) inputArea.style.display = "flex";
   carregarChatAtivo(id);
-  carregarListaConversas();
+  markAdminConversationRead(id).then(carregarListaConversas);
+}
+
+function htmlMensagemChat(m) {
+  return `<div class="msg ${m.is_from_admin ? "msg-admin" : "msg-user"}">${
+    m.message
+  }</div>`;
 }
 
 async function carregarChatAtivo(uid) {
@@ -777,14 +826,23 @@ async function carregarChatAtivo(uid) {
   const container = document.getElementById("admin-chat-messages");
   if (!container) return;
 
-  container.innerHTML = msgs
-    .map(
-      (m) =>
-        `<div class="msg ${m.is_from_admin ? "msg-admin" : "msg-user"}">${
-          m.message
-        }</div>`
-    )
-    .join("");
+  container.innerHTML = msgs.map(htmlMensagemChat).join("");
+  ultimoIdChatAtivo = msgs.length ? msgs[msgs.length - 1].id : null;
+  container.scrollTop = container.scrollHeight;
+}
+
+// Busca só as mensagens novas (after_id) em vez de recarregar a conversa toda
+async function atualizarChatAtivo(uid) {
+  if (ultimoIdChatAtivo === null) return carregarChatAtivo(uid);
+
+  const resposta = await fetchAdminUserHistory(uid, { after_id: ultimoIdChatAtivo });
+  const container = document.getElementById("admin-chat-messages");
+  // O socket pode ter exibido alguma delas enquanto a requisição ia e voltava
+  const novas = resposta.filter((m) => m.id > ultimoIdChatAtivo);
+  if (!container || uid !== chatUserIdAtivo || !novas.length) return;
+
+  container.insertAdjacentHTML("beforeend", novas.map(htmlMensagemChat).join(""));
+  ultimoIdChatAtivo = novas[novas.length - 1].id;
   container.scrollTop = container.scrollHeight;
 }
 
@@ -795,7 +853,7 @@ async function enviarRespostaAdmin() {
 
   if (await sendAdminReply(chatUserIdAtivo, txt)) {
     inp.value = "";
-    carregarChatAtivo(chatUserIdAtivo);
+    atualizarChatAtivo(chatUserIdAtivo);
   } else {
     showToast("Erro ao enviar.", "error");
   }
@@ -1502,16 +1560,21 @@ function openConfigTab(tabName) {
  * Carrega as avaliações dos clientes no painel administrativo.
  * Ajustado para utilizar o padrão de cookies HttpOnly do sistema.
  */
-async function carregarAvaliacoesAdmin() {
+async function carregarAvaliacoesAdmin(cursor = null) {
   const tbody = document.getElementById("admin-reviews-tbody");
   if (!tbody) return;
 
-  tbody.innerHTML = '<tr><td colspan="5">Carregando...</td></tr>';
+  // Primeira página limpa a tabela; "Carregar mais" só acrescenta
+  const botaoMais = document.getElementById("admin-reviews-mais");
+  if (botaoMais) botaoMais.remove();
+  if (!cursor) tbody.innerHTML = '<tr><td colspan="5">Carregando...</td></tr>';
 
   try {
     // Busca os dados usando o prefixo /api definido no api.js
     // credentials: "include" é essencial para enviar o cookie de sessão
-    const res = await fetch("/api/avaliar/listar", {
+    const params = new URLSearchParams({ limit: 100 });
+    if (cursor) params.set("cursor", cursor);
+    const res = await fetch(`/api/avaliar/listar?${params}`, {
       method: "GET",
       credentials: "include",
       headers: {
@@ -1521,16 +1584,16 @@ async function carregarAvaliacoesAdmin() {
 
     if (!res.ok) throw new Error("Falha na requisição");
 
-    const data = await res.json();
+    const { reviews, next_cursor } = await res.json();
 
-    tbody.innerHTML = "";
-    if (!data || data.length === 0) {
+    if (!cursor) tbody.innerHTML = "";
+    if (!cursor && (!reviews || reviews.length === 0)) {
       tbody.innerHTML =
         '<tr><td colspan="5">Nenhuma avaliação encontrada.</td></tr>';
       return;
     }
 
-    data.forEach((rev) => {
+    reviews.forEach((rev) => {
       const row = `
             <tr>
                 <td>${rev.date || "---"}</td>
@@ -1548,6 +1611,15 @@ async function carregarAvaliacoesAdmin() {
             </tr>`;
       tbody.innerHTML += row;
     });
+
+    if (next_cursor) {
+      tbody.innerHTML += `
+            <tr id="admin-reviews-mais">
+                <td colspan="5" style="text-align:center;">
+                    <button class="btn-small" onclick="carregarAvaliacoesAdmin('${next_cursor}')">Carregar mais</button>
+                </td>
+            </tr>`;
+    }
   } catch (error) {
     console.error("Erro ao carregar avaliações:", error);
     tbody.innerHTML =
@@ -1589,6 +1661,7 @@ try {
   window.moverParaEntrega = moverParaEntrega;
   window.concluirPedidoDefinitivo = concluirPedidoDefinitivo;
   window.carregarPedidosAdmin = carregarPedidosAdmin;
+  window.carregarMaisPedidosAdmin = carregarMaisPedidosAdmin;
   window.mudarStatus = mudarStatus;
   window.carregarMenuAdmin = carregarMenuAdmin;
   window.toggleProd = toggleProd;
@@ -24,6 +24,14 @@ const processQueue = (error, token = null) => {
   failedQueue = [];
 };
 
+// Disparado quando o cookie de sessão muda (login, logout, refresh do token).
+// O socket (socket.js) escuta e refaz o handshake com o cookie novo.
+export const SESSION_EVENT = "sessao-alterada";
+
+export function notificarSessaoAlterada() {
+  window.dispatchEvent(new Event(SESSION_EVENT));
+}
+
 /**
  * HELPER CENTRALIZADO DE REQUISIÇÕES
  * * Refatorado para HttpOnly:
@@ -31,13 +39,14 @@ const processQueue = (error, token = null) => {
  * 2. Garante credentials: "include" para enviar o cookie.
  * 3. Permite sobrescrever headers se necessário (ex: reset de senha).
  */
-async function attemptTokenRefresh() {
+export async function attemptTokenRefresh() {
   try {
     // Tenta bater na rota de refresh (que lê o cookie HttpOnly secure)
     const response = await fetch(`${API_BASE_URL}/auth/refresh`, {
       method: "POST",
       credentials: "include",
     });
+    if (response.ok) notificarSessaoAlterada();
     return response.ok;
   } catch (error) {
     console.error("Erro no refresh:", error);
@@ -221,6 +230,22 @@ export const fetchBebidas = async () => {
 };
 
 // --- PEDIDOS ---
+// Chave de idempotência da tentativa de checkout em andamento, presa ao
+// conteúdo do pedido. sessionStorage: sobrevive a um F5 depois do timeout.
+const CHECKOUT_KEY_STORAGE = "checkout_idempotency";
+
+function chaveDoCheckout(body) {
+  try {
+    const salvo = JSON.parse(sessionStorage.getItem(CHECKOUT_KEY_STORAGE));
+    if (salvo && salvo.body === body) return salvo.key;
+  } catch (e) {}
+
+  // Pedido novo (ou carrinho/endereço mudou): chave nova
+  const key = crypto.randomUUID();
+  sessionStorage.setItem(CHECKOUT_KEY_STORAGE, JSON.stringify({ key, body }));
+  return key;
+}
+
 export async function submitOrder(frontData, abrirWhatsapp = true) {
   const itemsFormatados = frontData.cartItems.map((item) => ({
     product_id: item.productId || item.id,
@@ -250,12 +275,29 @@ export async function submitOrder(frontData, abrirWhatsapp = true) {
     coupon_code: frontData.coupon_code,
   };
 
+  const body = JSON.stringify(payload);
+  const idempotencyKey = chaveDoCheckout(body);
+
   try {
     const response = await fetchAuth("/orders/create", {
       method: "POST",
-      body: JSON.stringify(payload),
+      body,
+      // Reenvios deste mesmo pedido (timeout, "Finalizar" de novo, F5) usam a
+      // MESMA chave: o servidor devolve o pedido já criado em vez de duplicar
+      headers: { "Idempotency-Key": idempotencyKey },
     });
 
+    // Resposta definitiva (criado ou recusado): a próxima tentativa é outro pedido.
+    // Falha de rede/5xx, 409 (ainda processando) e 429 mantêm a chave.
+    if (
+      response.status === 201 ||
+      (response.status >= 400 &&
+        response.status < 500 &&
+        ![409, 429].includes(response.status))
+    ) {
+      sessionStorage.removeItem(CHECKOUT_KEY_STORAGE);
+    }
+
     if (response.status === 401) {
       showToast("Sua sessão expirou. Faça login novamente.", "warning");
       import("./auth.js").then((module) => module.logout());
@@ -398,14 +440,23 @@ export async function fetchMyOrders() {
     return [];
   }
 }
-export async function getChatMessages() {
+// Histórico paginado: { limit } | { before_id } (mais antigas) | { after_id } (só as novas)
+export async function getChatMessages(params = {}) {
   try {
-    const res = await fetchAuth("/chat");
+    const query = new URLSearchParams(params).toString();
+    const res = await fetchAuth(query ? `/chat?${query}` : "/chat");
     return res.ok ? await res.json() : [];
   } catch {
     return [];
   }
 }
+export async function markChatRead() {
+  try {
+    return (await fetchAuth("/chat/read", { method: "POST" })).ok;
+  } catch {
+    return false;
+  }
+}
 export async function sendChatMessage(text) {
   try {
     return (
@@ -447,16 +498,31 @@ export async function updateOrderStatus(id, status) {
   }
 }
 export async function fetchAdminConversations() {
+  // Caixa de entrada paginada: a lista lateral mostra só a página mais recente
   try {
     const res = await fetchAuth("/chat/admin/conversations");
-    return res.ok ? await res.json() : [];
+    return res.ok ? (await res.json()).conversations : [];
   } catch {
     return [];
   }
 }
-export async function fetchAdminUserHistory(userId) {
+export async function markAdminConversationRead(userId) {
+  try {
+    return (
+      await fetchAuth(`/chat/admin/conversations/${userId}/read`, {
+        method: "POST",
+      })
+    ).ok;
+  } catch {
+    return false;
+  }
+}
+export async function fetchAdminUserHistory(userId, params = {}) {
   try {
-    const res = await fetchAuth(`/chat/admin/history/${userId}`);
+    const query = new URLSearchParams(params).toString();
+    const res = await fetchAuth(
+      `/chat/admin/history/${userId}${query ? `?${query}` : ""}`
+    );
     return res.ok ? await res.json() : [];
   } catch {
     return [];
@@ -642,12 +708,17 @@ export async function fetchOrderDossier(id) {
     return null;
   }
 }
-export async function fetchAdminOrders(filtros = {}) {
+export async function fetchAdminOrders(filtros = {}, cursor = null) {
+  // Uma página por chamada (a API pagina por cursor): quem chama decide se
+  // pede a próxima com o next_cursor devolvido ("Carregar mais")
   try {
-    const params = new URLSearchParams(filtros).toString();
+    const params = new URLSearchParams(filtros);
+    if (cursor) params.set("cursor", cursor);
     const res = await fetchAuth(`/orders/admin?${params}`);
-    return res.ok ? await res.json() : [];
+    if (!res.ok) return { orders: [], next_cursor: null };
+    const { orders, next_cursor } = await res.json();
+    return { orders: orders || [], next_cursor: next_cursor || null };
   } catch {
-    return [];
+    return { orders: [], next_cursor: null };
   }
 }
@@ -1,5 +1,10 @@
 // site/js/auth.js
-import { loginUser, API_BASE_URL, fetchCurrentUser } from "./api.js";
+import {
+  loginUser,
+  API_BASE_URL,
+  fetchCurrentUser,
+  notificarSessaoAlterada,
+} from "./api.js";
 import { showToast } from "./utils.js";
 // ==========================================
 //  GESTÃO DE SESSÃO (Interface Visual)
@@ -8,8 +13,12 @@ import { showToast } from "./utils.js";
 let currentUserInMemory = null;
 
 export function saveSession(token_ignored, user) {
+  // Entrou (ou trocou de conta): o socket refaz o handshake com o cookie novo
+  const trocouUsuario = !currentUserInMemory || currentUserInMemory.id !== user.id;
+
   // 1. Salva dados completos na MEMÓRIA RAM (para uso imediato do socket/api)
   currentUserInMemory = user;
+  if (trocouUsuario) notificarSessaoAlterada();
 
   // 2. Prepara objeto "Leve" apenas para controle de UI (Botões)
   const sessionUI = {
@@ -79,9 +88,11 @@ export function getCurrentUserSecure() {
   return currentUserInMemory;
 }
 export function clearSession() {
+  const estavaLogado = currentUserInMemory !== null;
   localStorage.removeItem("session_ui"); // Remove sinalizador visual
   localStorage.removeItem("user"); // Garante limpeza de legado
   currentUserInMemory = null; // Limpa memória
+  if (estavaLogado) notificarSessaoAlterada(); // Socket sai das salas do usuário
 }
 
 export async function logout() {
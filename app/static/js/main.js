@@ -12,6 +12,7 @@ import {
   fetchMyOrders,
   getChatMessages,
   sendChatMessage,
+  markChatRead,
   fetchPublicCoupons,
   fetchNeighborhoodsPublic,
   fetchSchedule,
@@ -30,6 +31,7 @@ import {
   getCurrentUserSecure,
 } from "./auth.js";
 
+import { conectarSocket } from "./socket.js";
 import { showToast } from "./utils.js";
 
 // Estado Global
@@ -126,28 +128,13 @@ document.addEventListener("DOMContentLoaded", async () => {
     window.location.hostname === "localhost"
       ? "http://localhost:5000"
       : "https://cegonha-lanches-backend.onrender.com";
-  const socket = io(socketUrl);
+  // O cookie do login vai no handshake e o servidor coloca este socket na
+  // sala do usuário (só recebe os próprios pedidos e mensagens). Depois de
+  // login/refresh do token, o conectarSocket refaz o handshake sozinho.
+  const socket = conectarSocket(socketUrl);
 
   socket.on("connect", () => {
-    if (typeof io !== "undefined") {
-      // 1. Conexão
-      const socketUrl =
-        window.location.hostname === "localhost"
-          ? "http://localhost:5000"
-          : "https://cegonha-lanches-backend.onrender.com";
-      const socket = io(socketUrl);
-
-      socket.on("connect", () => {
-        console.log("🟢 Conectado ao servidor!");
-      });
-
-      // ... (resto do código do socket.on 'status_update', 'chat_message', etc) ...
-      // Mantenha todo o resto do código do socket DENTRO deste bloco if
-    } else {
-      console.warn(
-        "Socket.IO não carregado nesta página. Chat e notificações desativados."
-      );
-    }
+    console.log("🟢 Conectado ao servidor!");
   });
 
   // 2. Atualização de Status do Pedido
@@ -1883,6 +1870,7 @@ function toggleChat() {
       carregarMensagens();
       historicoCarregado = true;
     }
+    markChatRead(); // Zera as respostas não lidas do restaurante
 
     // Foca no input para digitar rápido
     setTimeout(() => {
@@ -2526,8 +2514,9 @@ async function carregarAvaliacoes() {
     '<p class="loading-msg" style="color:white; width:100vw">Carregando...</p>';
 
   try {
+    // Uma página basta para o carrossel (o backend pagina por cursor)
     const res = await fetch(`/api/avaliar/listar?order=${filtro}`);
-    const data = await res.json();
+    const data = (await res.json()).reviews || [];
 
     // Salva na global para o modal usar (conforme solicitado anteriormente)
     window.reviewsCarregadas = data;
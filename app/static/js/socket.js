@@ -0,0 +1,33 @@
+// site/js/socket.js
+
+import { SESSION_EVENT, attemptTokenRefresh } from "./api.js";
+import { getSession } from "./auth.js";
+
+/**
+ * Abre o Socket.IO com o cookie de login no handshake.
+ * O servidor só coloca o socket nas salas do usuário (user:<id> / admins)
+ * durante o handshake, então:
+ * - login, logout ou refresh do token (SESSION_EVENT) -> reconecta;
+ * - handshake sem token válido com sessão aberta na tela (cookie de acesso
+ *   vencido, reconexão após queda) -> renova o token, o que reconecta.
+ */
+export function conectarSocket(url) {
+  const socket = io(url, { withCredentials: true });
+  let tentouRenovar = false; // Uma tentativa até um handshake autenticado
+
+  window.addEventListener(SESSION_EVENT, () => {
+    socket.disconnect().connect();
+  });
+
+  socket.on("session", async ({ authenticated }) => {
+    if (authenticated) {
+      tentouRenovar = false;
+      return;
+    }
+    if (!getSession().logged || tentouRenovar) return;
+    tentouRenovar = true;
+    await attemptTokenRefresh(); // Sucesso dispara SESSION_EVENT
+  });
+
+  return socket;
+}
@@ -27,4 +27,30 @@ BLOCKLIST = {
     "xana", "xochota", "xota", "xoxota",
     "xupou", 
     "zica", "zorra"
-}
\ No newline at end of file
+}
+
+# Textos comuns de cardápio, pedido e avaliação que NUNCA podem ser bloqueados.
+# O filtro (app/utils/moderation.py) confere esta lista ao subir o app: se um
+# termo novo da BLOCKLIST bloquear algum destes, o app não sobe.
+# Ao achar um falso positivo, acrescente o texto aqui.
+ALLOWED_TEXTS = (
+    # --- Cardápio ---
+    "Quero uma água de coco gelada", "Sorvete de coco", "Coco ralado", "Cocada", "Bolo de coco",
+    "X-Burger", "X-Bacon", "X-Tudo", "X-Salada", "Cachorro-quente", "Hambúrguer artesanal",
+    "Pão de hambúrguer", "Pão francês", "Batata frita", "Batata rústica", "Onion rings",
+    "Arroz, feijão e farofa", "Frango empanado", "Filé de frango", "Carne moída", "Picanha",
+    "Costela", "Linguiça calabresa", "Bisteca", "Contrafilé", "Pernil", "Presunto e queijo",
+    "Cheddar", "Catupiry", "Requeijão", "Maionese caseira", "Ketchup", "Mostarda",
+    "Cebola caramelizada", "Alface, tomate e milho", "Ervilha", "Ovo", "Bacon",
+    "Coca-Cola", "Guaraná", "Refrigerante lata", "Suco de maracujá", "Suco de laranja",
+    "Cerveja", "Água com gás", "Milkshake de morango", "Açaí com granola",
+    "Pudim", "Brigadeiro", "Mousse de chocolate", "Doce de leite", "Pastel de carne", "Coxinha",
+    # --- Pedido / Entrega ---
+    "Sem cebola, por favor", "Capricha no molho", "Troco para 50", "Pagamento no pix",
+    "Cartão de crédito", "O entregador foi muito educado", "Chegou rápido", "Demorou demais",
+    "Tá frio", "Veio quente", "Faltou o refrigerante", "Quero cancelar o pedido",
+    # --- Avaliações ---
+    "Lanche maravilhoso", "Muito gostoso", "Ótimo atendimento", "Péssimo", "Delícia",
+    "Saboroso demais", "Nota dez", "Recomendo!", "O melhor da cidade", "Carro de entrega",
+    "Pica-pau", "Cuidado com a embalagem", "Uva passa", "Bem passado",
+)
@@ -0,0 +1,55 @@
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+
+
+def get_redis():
+    """
+    Retorna o cliente Redis se o REDIS_URI estiver configurado.
+    Sem Redis (ambiente Dev), retorna None e quem chamou usa o cache local.
+    """
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('redis')
+
+
+class LocalTTLCache:
+    """
+    Cache em memória (por processo) com TTL e limite de tamanho (LRU).
+    Usado como plano B quando o REDIS_URI não está configurado.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # {chave: (expira_em, valor)}
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def add(self, key, value, ttl=None):
+        """Grava só se a chave não existir (equivalente ao SET NX). Retorna True se gravou."""
+        if self.get(key) is not None:
+            return False
+        self.set(key, value, ttl)
+        return True
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
@@ -0,0 +1,156 @@
+import re
+import unicodedata
+from bisect import bisect_right
+
+try:
+    from .bad_words import BLOCKLIST
+except ImportError:
+    BLOCKLIST = set()  # Evita erro se o arquivo não existir
+
+try:
+    from .bad_words import ALLOWED_TEXTS
+except ImportError:
+    ALLOWED_TEXTS = ()
+
+# ==============================================================================
+# 🛡️ MODERAÇÃO (Filtro de palavras impróprias)
+# ==============================================================================
+# O texto é normalizado antes da busca, para pegar as variações comuns:
+#   "PORRA!!"  -> "pora"      (caixa, pontuação)
+#   "estúpido" -> "estupido"  (acentos)
+#   "merdaaaa" -> "merda"     (letras repetidas; a lista passa pela mesma regra)
+#   "p.u.t.a"  -> "puta"      (letras soltas separadas por pontuação/espaço)
+#   "pica-pau" -> "picapau"   (palavra com hífen continua UMA palavra)
+# A lista vira UMA regex compilada no formato de árvore de prefixos
+# ("merda|merdinha" -> "merd(?:a|inha)"): o custo por caractere não cresce
+# com o tamanho da lista, então milhares de termos continuam abaixo de 1 ms.
+#
+# Termo que, sem acento, vira palavra comum ("cocô" -> "coco") só é
+# bloqueado COM o acento. ALLOWED_TEXTS (bad_words.py) lista textos comuns
+# de cardápio/avaliação; se algum termo da lista bloquear um deles, o app
+# nem sobe (ValueError na importação), em vez de recusar pedidos em silêncio.
+
+_HYPHEN = re.compile(r'(?<=\w)-(?=\w)')
+_NON_WORD = re.compile(r'[\W_]+')
+_SPACED_LETTERS = re.compile(r'(?<!\w)(?:[^\W_] ){2,}[^\W_](?!\w)')  # 3+ letras soltas seguidas
+_REPEATED_LETTERS = re.compile(r'([^\W\d_])\1+')
+
+
+def _strip_accents(text):
+    return ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+
+
+def normalize_text(text, fold_accents=True):
+    """Minúsculas, sem pontuação, sem letras repetidas e (por padrão) sem acento."""
+    if not text:
+        return ''
+    if fold_accents and not text.isascii():
+        text = _strip_accents(text)
+    text = _HYPHEN.sub('', text.casefold())
+    text = _NON_WORD.sub(' ', text).strip()
+    text = _SPACED_LETTERS.sub(lambda m: m.group().replace(' ', ''), text)
+    return _REPEATED_LETTERS.sub(r'\1', text)
+
+
+def _trie_regex(node):
+    """Converte a árvore de prefixos {letra: {...}, '': True} em regex."""
+    alternatives = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch != '']
+    if not alternatives:
+        return ''
+    pattern = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+    # Termo que termina aqui: o resto é opcional ("merd(?:a|inha)" vs "merda(?:inha)?")
+    return f"(?:{pattern})?" if '' in node else pattern
+
+
+def _compile_terms(terms):
+    if not terms:
+        return None
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    return re.compile(rf"(?<!\w)(?:{_trie_regex(trie)})(?!\w)")
+
+
+class ModerationMatcher:
+    """
+    Busca termos proibidos em palavras inteiras do texto normalizado
+    ("cu" bloqueia "cu", mas não "cuidado"). Termos com espaço viram frases.
+    """
+
+    def __init__(self, terms, allowed_texts=()):
+        allowed_words = set()
+        for allowed in allowed_texts:
+            allowed_words.update(normalize_text(allowed).split())
+
+        folded_terms, accented_terms = set(), set()
+        for term in terms:
+            folded = normalize_text(term)
+            accented = normalize_text(term, fold_accents=False)
+            if not folded:
+                continue
+            if folded in allowed_words and accented != folded:
+                accented_terms.add(accented)  # "cocô" sim, "coco" não
+            else:
+                folded_terms.add(folded)
+
+        self.terms = folded_terms | accented_terms
+        self._pattern = _compile_terms(folded_terms)
+        self._accented_pattern = _compile_terms(accented_terms)
+
+        blocked = [(text, self.find(text)) for text in allowed_texts if self.find(text)]
+        if blocked:
+            raise ValueError(f"A BLOCKLIST bloqueia textos comuns (ALLOWED_TEXTS): {blocked}")
+
+    def _find_accented(self, text):
+        # Termos com acento só podem aparecer em texto que não é ASCII puro
+        if self._accented_pattern is None or text.isascii():
+            return None
+        match = self._accented_pattern.search(normalize_text(text, fold_accents=False))
+        return match.group() if match else None
+
+    def find(self, text):
+        """Retorna o primeiro termo proibido encontrado (normalizado) ou None."""
+        if not text:
+            return None
+        match = self._pattern.search(normalize_text(text)) if self._pattern else None
+        return match.group() if match else self._find_accented(text)
+
+    def contains(self, text):
+        return self.find(text) is not None
+
+    def scan_many(self, texts):
+        """
+        Versão em lote do find(): uma única busca sobre todos os textos
+        juntos (separados por quebra de linha, que nunca faz parte de um termo).
+        Retorna uma lista alinhada com `texts`: termo encontrado ou None.
+        """
+        texts = list(texts)
+        results = [None] * len(texts)
+        if not texts:
+            return results
+
+        if self._pattern is not None:
+            starts, offset = [], 0
+            normalized = []
+            for text in texts:
+                clean = normalize_text(text)
+                starts.append(offset)
+                normalized.append(clean)
+                offset += len(clean) + 1
+
+            for match in self._pattern.finditer('\n'.join(normalized)):
+                index = bisect_right(starts, match.start()) - 1
+                if results[index] is None:
+                    results[index] = match.group()
+
+        for index, text in enumerate(texts):
+            if results[index] is None and text:
+                results[index] = self._find_accented(text)
+        return results
+
+
+# Compilado (e conferido contra ALLOWED_TEXTS) uma vez, na importação (subida do app)
+moderation = ModerationMatcher(BLOCKLIST, ALLOWED_TEXTS)
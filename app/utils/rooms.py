@@ -0,0 +1,12 @@
+# ==============================================================================
+# 📡 SALAS DO SOCKET.IO
+# ==============================================================================
+# Cada socket autenticado entra na sala do próprio usuário (user:<id>) e,
+# se for admin, também na sala 'admins'. Os services emitem só para quem
+# interessa, em vez de mandar tudo para todas as conexões.
+ADMINS_ROOM = 'admins'
+ADMIN_ROLES = ('admin', 'super_admin')
+
+
+def user_room(user_id):
+    return f'user:{user_id}'
@@ -0,0 +1,15 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from ..extensions import db
+
+_UPSERT_DIALECTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def upsert_insert(model):
+    """
+    INSERT com suporte a ON CONFLICT (on_conflict_do_update / do_nothing)
+    para o banco em uso: Postgres em produção, SQLite em Dev.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in _UPSERT_DIALECTS:
+        raise ValueError(f"Banco '{dialect}' não suporta UPSERT nesta aplicação.")
+    return _UPSERT_DIALECTS[dialect](model)
@@ -0,0 +1,131 @@
+"""
+Benchmark de criação de pedidos (checkout).
+
+Compara o caminho antigo (um SELECT FOR UPDATE + session.add por item, com
+flush antecipado só para pegar o ID do pedido) com o create_order_logic atual
+(reserva em lote + INSERT em lote dos itens).
+
+Uso:
+    python benchmarks/bench_checkout.py                 # SQLite temporário novo
+    python benchmarks/bench_checkout.py 300 12 --db postgresql://... --drop-tables
+
+Argumentos opcionais: <qtd_pedidos> <itens_por_carrinho>
+O DATABASE_URL do ambiente/.env é ignorado: sem --db, roda num SQLite numa
+pasta temporária nova. ⚠️ Com --db, APAGA e recria as tabelas do banco
+apontado, por isso exige também --drop-tables. NUNCA aponte para produção.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description="Benchmark do checkout (create_order_logic).")
+parser.add_argument('orders', nargs='?', type=int, default=200, help="qtd de pedidos (padrão 200)")
+parser.add_argument('items', nargs='?', type=int, default=8, help="itens por carrinho (padrão 8)")
+parser.add_argument('--db', help="URL do banco (padrão: SQLite temporário novo)")
+parser.add_argument('--drop-tables', action='store_true', help="confirma que as tabelas do --db podem ser apagadas")
+args = parser.parse_args()
+if args.db and not args.drop_tables:
+    parser.error("--db apaga e recria todas as tabelas do banco: confirme com --drop-tables")
+
+# Sempre explícito: nunca herda o DATABASE_URL do ambiente (o .env não sobrescreve)
+os.environ['DATABASE_URL'] = args.db or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_checkout.db')}"
+
+from app import create_app
+from app.extensions import db
+from app.models import User, Product, Order, OrderItem
+from app.services.order_service import create_order_logic
+
+N_ORDERS = args.orders
+ITEMS_PER_CART = args.items
+N_PRODUCTS = 30
+
+
+def legacy_create_order(user_id, data):
+    """Réplica do fluxo antigo, mantida aqui só como referência de medida."""
+    items_data = data.get('items', [])
+    try:
+        new_order = Order(user_id=user_id, status='Recebido', total_price=0.00, delivery_fee=0.00)
+        db.session.add(new_order)
+        db.session.flush()
+
+        calculated_total = Decimal('0.00')
+        for item in items_data:
+            qtd = item.get('quantity', 1)
+            product = Product.query.filter_by(id=item.get('product_id')).with_for_update().first()
+            if product.stock_quantity is not None:
+                product.stock_quantity -= qtd
+            calculated_total += product.price * qtd
+            db.session.add(OrderItem(
+                order_id=new_order.id,
+                product_id=product.id,
+                quantity=qtd,
+                price_at_time=product.price,
+                customizations_json=str(item.get('customizations', {}))
+            ))
+
+        new_order.total_price = calculated_total
+        db.session.commit()
+        return new_order.id
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def build_cart(seed):
+    return {
+        "customer": {"name": "Bench", "phone": "34999999999", "address": {"street": "Rua", "number": 1}},
+        "payment_method": "cash",
+        # Ordem embaralhada de propósito (é o que dispara deadlock no fluxo antigo)
+        "items": [
+            {"product_id": ((seed * 7 + i * 11) % N_PRODUCTS) + 1, "quantity": 1, "customizations": {}}
+            for i in range(ITEMS_PER_CART)
+        ]
+    }
+
+
+def run(label, fn, user_id):
+    carts = [build_cart(i) for i in range(N_ORDERS)]
+    start = time.perf_counter()
+    for cart in carts:
+        fn(user_id, cart)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {N_ORDERS} pedidos x {ITEMS_PER_CART} itens: "
+          f"{elapsed:.3f}s  ({N_ORDERS / elapsed:.1f} pedidos/s, {elapsed / N_ORDERS * 1000:.2f} ms/pedido)")
+    return elapsed
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        user = User(name='Bench', email='bench@bench.com', role='client', is_verified=True)
+        db.session.add(user)
+        for i in range(N_PRODUCTS):
+            db.session.add(Product(
+                name=f"Produto {i}",
+                price=Decimal('10.00') + i,
+                category='Lanche',
+                stock_quantity=10 ** 9 if i % 3 == 0 else None
+            ))
+        db.session.commit()
+        user_id = user.id
+
+        # Aquecimento (conexões, caches do SQLAlchemy)
+        legacy_create_order(user_id, build_cart(0))
+        create_order_logic(user_id, build_cart(0))
+
+        print(f"Banco: {db.engine.url.render_as_string(hide_password=True)}")
+        old = run("Fluxo antigo", legacy_create_order, user_id)
+        new = run("create_order_logic", create_order_logic, user_id)
+        print(f"Ganho: {old / new:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark do filtro de palavras impróprias (chat e avaliações).
+
+Compara o filtro antigo (lower + split + interseção com o set BLOCKLIST) com o
+ModerationMatcher (regex única em árvore de prefixos sobre texto normalizado),
+mensagem a mensagem e em lote (scan_many), com a lista real e com uma lista
+sintética de milhares de termos.
+
+Uso:
+    python benchmarks/bench_moderation.py                 # 20000 mensagens, 5000 termos
+    python benchmarks/bench_moderation.py 50000 20000
+
+Argumentos opcionais: <qtd_mensagens> <qtd_termos_sinteticos>
+Não precisa de banco.
+"""
+import os
+import sys
+import time
+import random
+import string
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.bad_words import BLOCKLIST
+from app.utils.moderation import ModerationMatcher
+
+N_MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+N_SYNTHETIC_TERMS = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+FRASES = [
+    "Boa noite, o meu pedido já saiu para entrega?",
+    "Quero um X-Burger sem cebola e com bacon extra, por favor!",
+    "Vocês aceitam pix? Qual o tempo de entrega para o bairro Centro?",
+    "O lanche chegou frio, que decepção... da próxima vez capricha",
+    "Obrigado!!! Melhor hambúrguer da cidade 🍔🍔",
+    "Moço, esqueceram o refrigerante do combo 1",
+]
+
+
+def legacy_contains(text, blocklist):
+    """Réplica do filtro antigo, mantida aqui só como referência de medida."""
+    return bool(blocklist.intersection(set(text.lower().split())))
+
+
+def build_messages(rng, terms):
+    messages = []
+    for i in range(N_MESSAGES):
+        text = rng.choice(FRASES)
+        if i % 20 == 0:
+            term = rng.choice(terms)
+            # ~5% com termo proibido; metade disfarçada (o filtro antigo não pega)
+            text = f"{text} {term if i % 40 == 0 else term.upper() + '!!'}"
+        messages.append(text)
+    return messages
+
+
+def synthetic_terms(rng):
+    letters = string.ascii_lowercase
+    return list(BLOCKLIST) + [
+        ''.join(rng.choice(letters) for _ in range(rng.randint(4, 12))) for _ in range(N_SYNTHETIC_TERMS)
+    ]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(label, terms, messages):
+    blocklist = set(terms)
+    build_time, matcher = timed(lambda: ModerationMatcher(terms))
+
+    legacy_time, legacy_hits = timed(lambda: sum(legacy_contains(m, blocklist) for m in messages))
+    single_time, single_hits = timed(lambda: sum(matcher.contains(m) for m in messages))
+    batch_time, batch_result = timed(lambda: matcher.scan_many(messages))
+    batch_hits = sum(r is not None for r in batch_result)
+
+    per_msg = lambda t: t / len(messages) * 1_000_000
+    print(f"\n{label}: {len(matcher.terms)} termos, compilação {build_time * 1000:.1f} ms")
+    print(f"  {'Filtro antigo':<26} {legacy_time:.3f}s  {per_msg(legacy_time):7.2f} µs/msg  ({legacy_hits} bloqueadas)")
+    print(f"  {'ModerationMatcher.contains':<26} {single_time:.3f}s  {per_msg(single_time):7.2f} µs/msg  ({single_hits} bloqueadas)")
+    print(f"  {'ModerationMatcher.scan_many':<26} {batch_time:.3f}s  {per_msg(batch_time):7.2f} µs/msg  ({batch_hits} bloqueadas)")
+
+
+def main():
+    rng = random.Random(42)
+    real_terms = list(BLOCKLIST)
+    run("Lista real", real_terms, build_messages(rng, real_terms))
+
+    big_terms = synthetic_terms(rng)
+    run("Lista sintética", big_terms, build_messages(rng, big_terms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark do relatório de produtos (/api/reports/products).
+
+Gera um ano de pedidos concluídos e mede report_service.get_product_sales_stats
+(sem cache) contra a abordagem ingênua: carregar cada OrderItem pelo ORM e
+decodificar o customizations_json item a item.
+
+Uso:
+    python benchmarks/bench_product_report.py                 # SQLite temporário novo
+    python benchmarks/bench_product_report.py 80 --db postgresql://... --drop-tables
+
+Argumento opcional: <pedidos_por_dia>
+O DATABASE_URL do ambiente/.env é ignorado: sem --db, roda num SQLite numa
+pasta temporária nova. ⚠️ Com --db, APAGA e recria as tabelas do banco
+apontado, por isso exige também --drop-tables. NUNCA aponte para produção.
+"""
+import os
+import sys
+import json
+import argparse
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta, date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description="Benchmark do relatório de produtos.")
+parser.add_argument('orders_per_day', nargs='?', type=int, default=60, help="pedidos por dia (padrão 60)")
+parser.add_argument('--db', help="URL do banco (padrão: SQLite temporário novo)")
+parser.add_argument('--drop-tables', action='store_true', help="confirma que as tabelas do --db podem ser apagadas")
+args = parser.parse_args()
+if args.db and not args.drop_tables:
+    parser.error("--db apaga e recria todas as tabelas do banco: confirme com --drop-tables")
+
+# Sempre explícito: nunca herda o DATABASE_URL do ambiente (o .env não sobrescreve)
+os.environ['DATABASE_URL'] = args.db or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_product_report.db')}"
+
+from sqlalchemy import insert
+from sqlalchemy.orm import contains_eager
+from app import create_app
+from app.extensions import db
+from app.models import User, Product, Order, OrderItem
+from app.services import report_service
+
+ORDERS_PER_DAY = args.orders_per_day
+DAYS = 365
+ADICIONAIS = ['Bacon', 'Ovo', 'Cheddar', 'Cebola']
+CATEGORIES = ['Lanche', 'Bebida', 'Combo', 'Porção']
+
+
+def naive_stats(start, end):
+    """Referência: um objeto ORM por item e json.loads por item."""
+    items = OrderItem.query.join(Order).options(contains_eager(OrderItem.order)).filter(
+        Order.status == 'Concluído', Order.date_created.between(start, end)
+    ).all()
+    stats = {}
+    for item in items:
+        s = stats.setdefault((item.product_id, item.order.date_created.hour), [0, Decimal('0'), 0])
+        s[0] += item.quantity
+        s[1] += item.price_at_time * item.quantity
+        if json.loads(item.customizations_json).get('adicionais'):
+            s[2] += item.quantity
+    return stats
+
+
+def seed(rng):
+    user = User(name='Bench', email='bench@bench.com', role='client', is_verified=True)
+    db.session.add(user)
+    products = [
+        Product(name=f"Produto {i}", price=Decimal('10.00') + i, category=CATEGORIES[i % len(CATEGORIES)])
+        for i in range(40)
+    ]
+    db.session.add_all(products)
+    db.session.commit()
+
+    first_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=DAYS)
+    order_id = 0
+    for day in range(DAYS):
+        orders, items = [], []
+        for _ in range(ORDERS_PER_DAY):
+            order_id += 1
+            created = first_day + timedelta(days=day, hours=rng.randint(11, 23), minutes=rng.randint(0, 59))
+            orders.append({"id": order_id, "user_id": user.id, "status": 'Concluído',
+                           "date_created": created, "total_price": 0, "payment_method": 'pix'})
+            for _ in range(rng.randint(1, 4)):
+                product = products[rng.randrange(len(products))]
+                extras = rng.sample(ADICIONAIS, rng.choice([0, 0, 1, 1, 2]))
+                items.append({"order_id": order_id, "product_id": product.id, "quantity": rng.randint(1, 3),
+                              "price_at_time": product.price,
+                              "customizations_json": json.dumps({"adicionais": sorted(extras), "obs": ""})})
+        db.session.execute(insert(Order), orders)
+        db.session.execute(insert(OrderItem), items)
+    db.session.commit()
+    return order_id
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        n_orders = seed(random.Random(42))
+        n_items = OrderItem.query.count()
+
+        end_day = date.today()
+        start_day = end_day - timedelta(days=DAYS)
+        start = datetime.combine(start_day, datetime.min.time())
+        end = datetime.combine(end_day, datetime.max.time())
+
+        print(f"Banco: {db.engine.url.render_as_string(hide_password=True)}")
+        print(f"{n_orders} pedidos / {n_items} itens em {DAYS} dias")
+
+        t = time.perf_counter()
+        naive_stats(start, end)
+        naive = time.perf_counter() - t
+        db.session.expunge_all()
+        print(f"{'ORM item a item':<26} {naive:.3f}s")
+
+        t = time.perf_counter()
+        result = report_service.get_product_sales_stats(start_day, end_day)
+        fast = time.perf_counter() - t
+        print(f"{'get_product_sales_stats':<26} {fast:.3f}s  ({result['total']['units']} unidades)")
+        print(f"Ganho: {naive / fast:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Roteiro de conferência das salas do Socket.IO (routes_socket + static/js/socket.js).
+
+As salas (user:<id> / admins) só são definidas no handshake. O roteiro faz o
+caminho de quem abre o site sem login e entra pela senha, sem recarregar:
+- socket conecta anônimo -> 'session' {authenticated: false}, não recebe status;
+- login pela rota real (cookies) -> o cliente reconecta (SESSION_EVENT);
+- novo handshake -> 'session' {authenticated: true} e o status_update chega;
+- outro cliente logado não recebe o status de quem não é dono do pedido.
+
+Uso:
+    python benchmarks/check_socket_rooms.py
+
+Sai com código 1 se alguma conferência falhar.
+Sempre usa um SQLite novo numa pasta temporária (ignora DATABASE_URL).
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'check_socket.db')}"
+os.environ.setdefault('SECRET_KEY', 'check-socket')
+
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.extensions import db, socketio, limiter
+from app.models import User, Order
+from app.services.order_service import update_order_status_logic
+
+failures = []
+
+
+def check(label, got, expected):
+    ok = got == expected
+    print(f"{'✅' if ok else '❌'} {label}: {got!r}" + ('' if ok else f" (esperado {expected!r})"))
+    if not ok:
+        failures.append(label)
+
+
+def events(socket_client, name):
+    return [e['args'][0] for e in socket_client.get_received() if e['name'] == name]
+
+
+def main():
+    app = create_app()
+    limiter.enabled = False
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        ana = User(name='Ana', email='ana@check.com', role='client', is_verified=True,
+                   password_hash=generate_password_hash('senha-ana'))
+        bia = User(name='Bia', email='bia@check.com', role='client', is_verified=True,
+                   password_hash=generate_password_hash('senha-bia'))
+        db.session.add_all([ana, bia])
+        db.session.commit()
+        order = Order(user_id=ana.id, customer_name='Ana', status='Recebido', total_price=10, delivery_fee=0)
+        db.session.add(order)
+        db.session.commit()
+        order_id = order.id
+
+    web = app.test_client()
+    other_web = app.test_client()
+
+    print("--- Socket aberto antes do login")
+    sock = socketio.test_client(app, flask_test_client=web)
+    check("handshake anônimo", events(sock, 'session'), [{"authenticated": False}])
+
+    res = web.post('/api/auth/login', json={'email': 'ana@check.com', 'password': 'senha-ana'})
+    check("login pela senha", res.status_code, 200)
+
+    with app.app_context():
+        update_order_status_logic(order_id, 'Em Preparo')
+    check("sem reconectar, o socket segue fora da sala", events(sock, 'status_update'), [])
+
+    print("--- Cliente reconecta depois do login (SESSION_EVENT)")
+    sock.disconnect()
+    sock.connect()
+    check("handshake com o cookie novo", events(sock, 'session'), [{"authenticated": True}])
+
+    other_web.post('/api/auth/login', json={'email': 'bia@check.com', 'password': 'senha-bia'})
+    other_sock = socketio.test_client(app, flask_test_client=other_web)
+    other_sock.get_received()
+
+    with app.app_context():
+        update_order_status_logic(order_id, 'Saiu para Entrega')
+    received = events(sock, 'status_update')
+    check("dona do pedido recebe o status", [(e['order_id'], e['status']) for e in received],
+          [(order_id, 'Saiu para Entrega')])
+    check("outro cliente não recebe", events(other_sock, 'status_update'), [])
+
+    print("--- Logout")
+    web.post('/api/auth/logout')
+    sock.disconnect()
+    sock.connect()
+    check("handshake depois do logout", events(sock, 'session'), [{"authenticated": False}])
+    with app.app_context():
+        update_order_status_logic(order_id, 'Concluído')
+    check("socket deslogado sai da sala", events(sock, 'status_update'), [])
+
+    if failures:
+        print(f"\n❌ {len(failures)} conferência(s) falharam.")
+        sys.exit(1)
+    print("\n✅ Salas do Socket.IO conferidas.")
+
+
+if __name__ == '__main__':
+    main()
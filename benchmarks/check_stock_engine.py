@@ -0,0 +1,150 @@
+"""
+Roteiro de conferência do motor de estoque Redis (stock_service).
+
+Roda reserva, devolução, write-back e reconciliação contra um Redis falso
+(fakeredis) e um SQLite temporário, incluindo as corridas que já derrubaram
+saldo em produção:
+- admin grava um estoque novo ENQUANTO o write-back segura o saldo antigo;
+- o processo do write-back morre entre pegar os ids e fazer o commit;
+- um id sujo se perde (o Redis tem um saldo que o banco nunca recebeu);
+- o reset do Redis depois de uma edição do admin não acontece;
+- um write-back atrasado tenta soltar o lock que já é de outro.
+
+Uso:
+    pip install fakeredis lupa
+    python benchmarks/check_stock_engine.py
+
+O write-back em segundo plano fica desligado: o roteiro chama o
+flush_stock_to_db() na hora certa. Sai com código 1 se alguma conferência falhar.
+Sempre usa um SQLite novo numa pasta temporária (ignora DATABASE_URL).
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'check_stock.db')}"
+os.environ.setdefault('SECRET_KEY', 'check-stock')
+
+try:
+    import fakeredis
+except ImportError:
+    sys.exit("❌ Precisa do fakeredis (e do lupa para os scripts Lua): pip install fakeredis lupa")
+
+from app import create_app
+from app.extensions import db
+from app.models import Product
+from app.services import stock_service, product_service
+
+failures = []
+
+
+def check(label, got, expected):
+    ok = got == expected
+    print(f"{'✅' if ok else '❌'} {label}: {got!r}" + ('' if ok else f" (esperado {expected!r})"))
+    if not ok:
+        failures.append(label)
+
+
+def redis_stock(redis, product_id):
+    value = redis.get(stock_service.STOCK_KEY.format(product_id))
+    return int(value) if value is not None else None
+
+
+def db_stock(product_id):
+    db.session.expire_all()
+    return db.session.get(Product, product_id).stock_quantity
+
+
+class AdminEditsDuringFlush(fakeredis.FakeStrictRedis):
+    """Redis falso que roda uma edição do admin logo depois do MGET do write-back."""
+    on_mget = None
+
+    def mget(self, *args, **kwargs):
+        values = super().mget(*args, **kwargs)
+        if self.on_mget:
+            callback, self.on_mget = self.on_mget, None
+            callback()
+        return values
+
+
+def main():
+    app = create_app()
+    redis = AdminEditsDuringFlush()
+    app.extensions['redis'] = redis
+    app.config['REDIS_STOCK_ENGINE'] = True
+    stock_service._schedule_flush = lambda: None
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        coca = Product(name='Coca', price=6, category='Bebida', stock_quantity=5)
+        suco = Product(name='Suco', price=8, category='Bebida', stock_quantity=10)
+        lanche = Product(name='X-Burger', price=20, category='Lanche')
+        db.session.add_all([coca, suco, lanche])
+        db.session.commit()
+        products = {p.id: p for p in (coca, suco, lanche)}
+        coca_id, suco_id, lanche_id = coca.id, suco.id, lanche.id
+
+        print("--- Reserva e devolução")
+        stock_service.reserve_stock({coca_id: 3}, products)
+        check("reserva semeia do banco e baixa", redis_stock(redis, coca_id), 2)
+        try:
+            stock_service.reserve_stock({coca_id: 5, suco_id: 1}, products)
+            check("falta de saldo recusa o carrinho inteiro", 'reservou', 'ValueError')
+        except ValueError:
+            check("falta de saldo não baixa nada", (redis_stock(redis, coca_id), redis_stock(redis, suco_id)), (2, 10))
+        stock_service.release_stock({coca_id: 1})
+        check("devolução soma no Redis", redis_stock(redis, coca_id), 3)
+
+        print("--- Write-back")
+        check("produtos gravados", stock_service.flush_stock_to_db(), 1)
+        check("banco recebe o saldo do Redis", (db_stock(coca_id), db_stock(suco_id)), (3, 10))
+
+        print("--- Admin grava 100 enquanto o write-back segura o saldo antigo")
+        stock_service.reserve_stock({coca_id: 1}, products)
+        redis.on_mget = lambda: product_service.update_product(coca_id, {'stock_quantity': 100})
+        stock_service.flush_stock_to_db()
+        check("banco fica com o valor do admin", db_stock(coca_id), 100)
+        check("Redis fica com o valor do admin", redis_stock(redis, coca_id), 100)
+
+        print("--- Write-back morre depois de pegar os ids")
+        stock_service.reserve_stock({coca_id: 4}, products)
+        stock_service._claim_dirty(redis)
+        check("ids presos em stock:flushing", redis.scard(stock_service.FLUSHING_KEY), 1)
+        stock_service.flush_stock_to_db()
+        check("próximo write-back recupera os ids", db_stock(coca_id), 96)
+        check("stock:flushing esvazia", redis.scard(stock_service.FLUSHING_KEY), 0)
+
+        print("--- Reconciliação")
+        redis.set(stock_service.STOCK_KEY.format(suco_id), 7)  # Venda cujo id sujo se perdeu
+        Product.query.filter_by(id=coca_id).update(  # Admin gravou, mas o reset do Redis não rodou
+            {Product.stock_quantity: 50, Product.stock_version: Product.stock_version + 1},
+            synchronize_session=False)
+        db.session.commit()
+        redis.set(stock_service.STOCK_KEY.format(lanche_id), 3)  # Produto sem controle de estoque
+        resumo = stock_service.reconcile_stock()
+        print(f"   resumo: {resumo}")
+        check("saldo perdido no Redis vai para o banco", db_stock(suco_id), 7)
+        check("versão nova do banco vai para o Redis", redis_stock(redis, coca_id), 50)
+        check("chave de produto sem controle sai do Redis", redis_stock(redis, lanche_id), None)
+        check("Redis e banco batem", {pid: redis_stock(redis, pid) for pid in (coca_id, suco_id)},
+              {coca_id: db_stock(coca_id), suco_id: db_stock(suco_id)})
+
+        print("--- Lock do write-back")
+        token = stock_service._try_flush_lock(redis)
+        check("segundo write-back não pega o lock", stock_service._try_flush_lock(redis), None)
+        stock_service._release_flush_lock(redis, 'token-de-um-write-back-vencido')
+        check("token alheio não solta o lock", redis.get(stock_service.FLUSH_LOCK_KEY), token.encode())
+        stock_service._release_flush_lock(redis, token)
+        check("dono solta o lock", redis.get(stock_service.FLUSH_LOCK_KEY), None)
+
+    if failures:
+        print(f"\n❌ {len(failures)} conferência(s) falharam.")
+        sys.exit(1)
+    print("\n✅ Motor de estoque conferido.")
+
+
+if __name__ == '__main__':
+    main()
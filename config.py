@@ -15,6 +15,16 @@ class Config:
     REDIS_URI = os.environ.get('REDIS_URI')
     RATELIMIT_STORAGE_URL = REDIS_URI
     REDIS_URL = REDIS_URI
+    # Reserva de estoque atômica no Redis (ver app/services/stock_service.py)
+    REDIS_STOCK_ENGINE = os.environ.get('REDIS_STOCK_ENGINE', 'false').lower() == 'true'
+    # Relatórios em segundo plano (ver app/services/report_job_service.py)
+    # Threads do SO por processo para os relatórios em segundo plano (com gevent,
+    # via gevent.threadpool: a query pesada não trava o hub das requisições)
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+    REPORT_JOB_MAX_QUEUE = int(os.environ.get('REPORT_JOB_MAX_QUEUE', 20))
+    REPORT_JOBS_DIR = os.environ.get('REPORT_JOBS_DIR')  # Sem Redis: resultados em disco (padrão: pasta temp)
+    # Fuso da loja: as horas do relatório de produtos saem nele (o banco grava em UTC)
+    STORE_TIMEZONE = os.environ.get('STORE_TIMEZONE', 'America/Sao_Paulo')
     # Configuração do JWT (Sistema de Token para Login)
     # Isso define que o token de login expira em 1 dia, por exemplo
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'chave-secreta-jwt'
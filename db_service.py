@@ -20,6 +20,11 @@ def help():
     print("list_products()           -> Lista produtos")
     print("toggle_product(id)        -> Ativa/Desativa um produto")
     print("list_orders()             -> Lista os últimos 10 pedidos")
+    print("reconcile_stock()         -> Sincroniza estoque Redis <-> banco")
+    print("backfill_sales_rollup()   -> Recalcula o resumo diário de vendas do dashboard")
+    print("backfill_rating_stats()   -> Recalcula a média/histograma das avaliações")
+    print("rebuild_search_index()    -> Reindexa a busca textual das avaliações")
+    print("explain_queries()         -> Mostra o plano (EXPLAIN) das consultas mais usadas")
     print("----------------------------\n")
 
 
@@ -44,18 +49,22 @@ def list_admins():
 
 
 def delete_user(email):
+    from app.services import identity_service
     with app.app_context():
         user = User.query.filter_by(email=email).first()
         if not user:
             print(f"❌ Usuário {email} não encontrado.")
             return
 
+        user_id = user.id
         db.session.delete(user)
         db.session.commit()
+        identity_service.invalidate_identity(user_id)
         print(f"User:{user} deletado!!")
 
 
 def set_admin(email):
+    from app.services import identity_service
     with app.app_context():
         user = User.query.filter_by(email=email).first()
         if not user:
@@ -64,6 +73,7 @@ def set_admin(email):
 
         user.role = 'admin'
         db.session.commit()
+        identity_service.invalidate_identity(user.id)
         print(f"✅ Sucesso! {user.name} agora é um ADMIN (Gerente).")
 
 
@@ -93,6 +103,7 @@ def list_products():
 
 
 def toggle_product(product_id):
+    from app.services import product_service
     with app.app_context():
         p = Product.query.get(product_id)
         if not p:
@@ -101,6 +112,7 @@ def toggle_product(product_id):
 
         p.is_available = not p.is_available
         db.session.commit()
+        product_service.bump_menu_version()  # Senão o cardápio em cache segue com o valor antigo
         status = "Disponível" if p.is_available else "Indisponível"
         print(f"✅ Produto '{p.name}' agora está {status}.")
 
@@ -118,6 +130,116 @@ def list_orders():
                 f"{o.id:<5} {o.date_created.strftime('%d/%m %H:%M'):<20} {o.customer_name[:19]:<20} {o.status:<15} R$ {o.total_price}")
 
 
+# --- ESTOQUE (Motor Redis) ---
+
+def reconcile_stock():
+    from app.services import stock_service
+    with app.app_context():
+        if not stock_service.is_enabled():
+            print("ℹ️ Motor de estoque Redis desligado (REDIS_STOCK_ENGINE/REDIS_URI).")
+            return
+        resumo = stock_service.reconcile_stock()
+        print(f"✅ Estoque reconciliado: {resumo}")
+
+
+# --- RELATÓRIOS ---
+
+def backfill_sales_rollup():
+    from app.services import report_service
+    with app.app_context():
+        linhas = report_service.rebuild_daily_rollup()
+        print(f"✅ Rollup de vendas recalculado: {linhas} linhas (dia x pagamento).")
+
+
+def backfill_rating_stats():
+    from app.services import coment_service
+    with app.app_context():
+        total = coment_service.rebuild_rating_stats()
+        print(f"✅ Resumo das avaliações recalculado: {total} avaliações.")
+
+
+def rebuild_search_index():
+    from app.services import coment_service
+    with app.app_context():
+        total = coment_service.rebuild_search_index()
+        print(f"✅ Busca das avaliações reindexada: {total} avaliações.")
+
+
+# --- DIAGNÓSTICO (Índices) ---
+
+def _hot_queries():
+    """Consultas mais pesadas do sistema, montadas igual aos services/rotas."""
+    from datetime import datetime, timedelta
+    from sqlalchemy import func, or_
+    from app.models import OrderItem, ChatMessage, Conversation, Coments, Address
+    from app.services.order_service import OPEN_STATUSES
+
+    now = datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_ago = now - timedelta(days=7)
+
+    return [
+        ("Admin: visão padrão (abertos OU hoje)",
+         Order.query.filter(or_(Order.status.in_(OPEN_STATUSES),
+                                Order.date_created >= today))
+         .order_by(Order.date_created.desc(), Order.id.desc()).limit(100)),
+        ("Admin: pedidos por status + período",
+         Order.query.filter(Order.status == 'Recebido', Order.date_created.between(week_ago, now))
+         .order_by(Order.date_created.desc(), Order.id.desc()).limit(100)),
+        ("Admin: próxima página (cursor)",
+         Order.query.filter(Order.date_created.between(week_ago, now),
+                            or_(Order.date_created < now,
+                                (Order.date_created == now) & (Order.id < 10 ** 9)))
+         .order_by(Order.date_created.desc(), Order.id.desc()).limit(100)),
+        ("Cliente: meus pedidos",
+         Order.query.filter(Order.user_id == 1).order_by(Order.date_created.desc())),
+        ("Relatório: faturamento do período",
+         db.session.query(func.sum(Order.total_price))
+         .filter(Order.status == 'Concluído', Order.date_created.between(week_ago, now))),
+        ("Relatório: filtro por pagamento",
+         Order.query.filter(Order.payment_method == 'pix', Order.date_created.between(week_ago, now))),
+        ("Itens de uma página de pedidos",
+         db.session.query(OrderItem.id).filter(OrderItem.order_id.in_([1, 2, 3]))),
+        ("Produto tem vendas? (delete_product)",
+         OrderItem.query.filter_by(product_id=1).limit(1)),
+        ("Chat: histórico do usuário",
+         ChatMessage.query.filter_by(user_id=1)
+         .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc()).limit(50)),
+        ("Chat: caixa de entrada do admin",
+         Conversation.query.filter(Conversation.last_message_at.isnot(None))
+         .order_by(Conversation.last_message_at.desc(), Conversation.user_id.desc()).limit(50)),
+        ("Avaliações: mais recentes",
+         Coments.query.order_by(Coments.timestamp.desc())),
+        ("Avaliações: por estrelas",
+         Coments.query.order_by(Coments.stars.desc(), Coments.timestamp.desc())),
+        ("Endereços do usuário",
+         Address.query.filter_by(user_id=1)),
+        ("Cardápio por categoria",
+         Product.query.filter_by(is_available=True, category='Lanche')),
+    ]
+
+
+def explain_queries():
+    """Imprime o plano de execução de cada consulta quente (SQLite ou Postgres)."""
+    with app.app_context():
+        dialect = db.engine.dialect
+        prefix = "EXPLAIN QUERY PLAN " if dialect.name == 'sqlite' else "EXPLAIN "
+
+        with db.engine.connect() as conn:
+            for label, query in _hot_queries():
+                compiled = query.statement.compile(
+                    dialect=dialect, compile_kwargs={"render_postcompile": True})
+                params = compiled.construct_params()
+                if compiled.positional:
+                    params = tuple(params[name] for name in compiled.positiontup)
+
+                print(f"\n🔎 {label}")
+                print("-" * 80)
+                for row in conn.exec_driver_sql(prefix + str(compiled), params):
+                    # SQLite: (id, parent, notused, detail) | Postgres: (linha,)
+                    print(f"   {row[-1]}")
+
+
 # Executa automaticamente o help se rodar o script
 if __name__ == "__main__":
     if __name__ == "__main__":
@@ -128,6 +250,11 @@ if __name__ == "__main__":
             "list_admins": list_admins,
             "list_products": list_products,
             "list_orders": list_orders,
+            "reconcile_stock": reconcile_stock,
+            "backfill_sales_rollup": backfill_sales_rollup,
+            "backfill_rating_stats": backfill_rating_stats,
+            "rebuild_search_index": rebuild_search_index,
+            "explain_queries": explain_queries,
             # Comandos com argumentos:
             "set_admin": set_admin,  # Espera 1 argumento (email)
             "delete_user": delete_user,  # Espera 1 argumento (email)
@@ -45,6 +45,20 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Índice de busca das avaliações: criado por SQL próprio de cada banco
+# (COMENTS_SEARCH_DDL em app/models.py), fora do metadata dos models.
+SEARCH_INDEX_OBJECTS = {'search_vector', 'ix_coments_search_vector'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if reflected and compare_to is None:
+        if type_ == 'table' and name.startswith('coments_fts'):
+            return False
+        if name in SEARCH_INDEX_OBJECTS:
+            return False
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +79,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +108,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
@@ -0,0 +1,58 @@
+"""Busca textual das avaliações
+
+Índice de busca sobre o texto da avaliação + nome do autor, já preenchido
+com as avaliações existentes (o mesmo do `python db_service.py rebuild_search_index`):
+- Postgres: coluna coments.search_vector (tsvector) + índice GIN
+- SQLite: tabela virtual FTS5 coments_fts (rowid = coments.id)
+
+Revision ID: f99f2b8ed528
+Revises: 1b321938428c
+Create Date: 2026-10-17 17:48:02.276325
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f99f2b8ed528'
+down_revision = '1b321938428c'
+branch_labels = None
+depends_on = None
+
+
+PG_FOLD = "translate(lower({}), 'áàâãäéèêëíìîïóòôõöúùûüç', 'aaaaaeeeeiiiiooooouuuuc')"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("ALTER TABLE coments ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_coments_search_vector ON coments USING GIN (search_vector)")
+        op.execute(
+            "UPDATE coments SET search_vector = "
+            "setweight(to_tsvector('portuguese', " + PG_FOLD.format("coalesce(coments.coment, '')") + "), 'A') || "
+            "setweight(to_tsvector('portuguese', " + PG_FOLD.format('coalesce("user".name, \'\')') + "), 'B') "
+            'FROM "user" WHERE "user".id = coments.user_id'
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS coments_fts "
+            "USING fts5(coment, author, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            'INSERT INTO coments_fts (rowid, coment, author) '
+            'SELECT coments.id, coments.coment, "user".name FROM coments '
+            'LEFT JOIN "user" ON "user".id = coments.user_id'
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_coments_search_vector")
+        op.execute("ALTER TABLE coments DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS coments_fts")
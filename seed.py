@@ -1,6 +1,7 @@
 from app import create_app
 from app.extensions import db
 from app.models import Product, User, ChatMessage, Address, StoreSchedule, Coments
+from app.services import product_service
 from werkzeug.security import generate_password_hash
 import json
 import os
@@ -299,6 +300,7 @@ def seed_products():
         db.session.add(nova_bebida)
 
     db.session.commit()
+    product_service.bump_menu_version()  # Cardápio em cache (Redis/ETag) passa a valer o novo
     print("✅ Menu (Lanches + Bebidas) populado com sucesso!")
 
 